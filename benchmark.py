@@ -0,0 +1,298 @@
+"""Offline-Benchmark für die Screenshot-Verarbeitung
+
+Erzeugt synthetische Ergebnis-Screenshots im Stil der Carrera Hybrid App mit bekannter
+Ground Truth, schickt sie durch die OCR-Pipeline und den Leaderboard-Update-Pfad
+(gegen einen Fake-Channel) und misst Latenzen, Durchsatz und Erkennungsgenauigkeit.
+
+Beispiel:
+    python benchmark.py --images 50 --workers 4
+"""
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import time
+from collections import Counter
+from io import BytesIO
+from typing import Dict, List, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+import main
+from fake_discord import FakeREST, FakeTextChannel, FakeUser
+
+FONT_CANDIDATES = [
+    'DejaVuSans-Bold.ttf',
+    'DejaVuSans.ttf',
+    'DejaVuSansMono.ttf',
+    'LiberationSans-Bold.ttf',
+    'LiberationSans-Regular.ttf',
+]
+RESOLUTIONS = [(1170, 2532), (1080, 2340), (828, 1792), (750, 1334)]
+JPEG_QUALITIES = [None, 95, 85, 70, 50]  # None: PNG
+DRIVER_NAMES = [
+    'CYSTIX', 'LEGENDE', 'WHITE DRAGON', 'DTFREAK', 'SPEEDKING', 'TURBO', 'BLITZ',
+    'NITRO', 'RACER X', 'SCHUMI', 'GRISU', 'KOBRA', 'FALKE', 'MAVERICK', 'PHANTOM',
+]
+
+def load_fonts() -> List[str]:
+    """Liefert alle verfügbaren TrueType-Schriften aus der Kandidatenliste"""
+    fonts = []
+    for name in FONT_CANDIDATES:
+        try:
+            ImageFont.truetype(name, 20)
+            fonts.append(name)
+        except OSError:
+            pass
+    return fonts
+
+def random_race_time(rng: random.Random) -> str:
+    total_ms = rng.randint(65_000, 95_000)
+    minutes, rest = divmod(total_ms, 60_000)
+    seconds, milliseconds = divmod(rest, 1000)
+    return f"{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+
+def render_screenshot(rng: random.Random, fonts: List[str]) -> Tuple[bytes, List[Tuple[str, str]], Dict]:
+    """Rendert einen Ergebnis-Screenshot und liefert Bilddaten, Ground Truth und Parameter"""
+    width, height = rng.choice(RESOLUTIONS)
+    driver_count = rng.randint(1, 6)
+    quality = rng.choice(JPEG_QUALITIES)
+    font_name = rng.choice(fonts) if fonts else None
+    scale = width / 1170
+
+    def font(size: int):
+        if font_name:
+            return ImageFont.truetype(font_name, int(size * scale))
+        return ImageFont.load_default()
+
+    image = Image.new('RGB', (width, height), (18, 18, 28))
+    draw = ImageDraw.Draw(image)
+
+    # Statusleiste und App-Kopf
+    draw.text((int(40 * scale), int(30 * scale)), '18:46', fill=(200, 200, 200), font=font(40))
+    draw.rectangle((0, int(180 * scale), width, int(330 * scale)), fill=(200, 16, 46))
+    draw.text((int(40 * scale), int(215 * scale)), 'RENNERGEBNIS', fill=(255, 255, 255), font=font(70))
+
+    # Ergebnistabelle
+    table_top = int(520 * scale)
+    row_height = int(120 * scale)
+    name_x = int(60 * scale)
+    time_x = int(720 * scale)
+    draw.text((name_x, table_top), 'RACER', fill=(150, 150, 160), font=font(44))
+    draw.text((time_x, table_top), 'ZEIT', fill=(150, 150, 160), font=font(44))
+
+    ground_truth = []
+    names = rng.sample(DRIVER_NAMES, driver_count)
+    for i, name in enumerate(names):
+        race_time = random_race_time(rng)
+        y = table_top + (i + 1) * row_height
+        draw.rectangle((int(30 * scale), y - int(20 * scale), width - int(30 * scale), y + int(80 * scale)), fill=(32, 32, 46))
+        draw.text((name_x, y), name, fill=(240, 240, 240), font=font(56))
+        draw.text((time_x, y), race_time, fill=(240, 240, 240), font=font(56))
+        ground_truth.append((name, race_time))
+
+    # Fußleiste mit Buttons
+    draw.rectangle((0, height - int(220 * scale), width, height), fill=(40, 40, 56))
+    draw.text((int(40 * scale), height - int(150 * scale)), 'WEITER', fill=(255, 255, 255), font=font(56))
+
+    buffer = BytesIO()
+    if quality is None:
+        image.save(buffer, format='PNG')
+    else:
+        image.save(buffer, format='JPEG', quality=quality)
+
+    params = {
+        'resolution': f"{width}x{height}",
+        'drivers': driver_count,
+        'format': 'PNG' if quality is None else f"JPEG q{quality}",
+        'font': font_name or 'default',
+    }
+    return buffer.getvalue(), ground_truth, params
+
+def percentiles(values: List[float]) -> str:
+    if not values:
+        return '-'
+    values = sorted(values)
+
+    def pick(p: float) -> float:
+        return values[min(int(p * len(values)), len(values) - 1)] * 1000
+
+    return f"p50 {pick(0.50):8.1f} ms | p95 {pick(0.95):8.1f} ms | p99 {pick(0.99):8.1f} ms | max {values[-1] * 1000:8.1f} ms"
+
+def score(extracted: List[Tuple[str, str]], ground_truth: List[Tuple[str, str]]) -> Tuple[int, int, int]:
+    """Liefert (true positives, extrahiert, erwartet) für Precision und Recall"""
+    normalized = Counter((name.upper(), race_time) for name, race_time in extracted)
+    expected = Counter((name.upper(), race_time) for name, race_time in ground_truth)
+    true_positives = sum((normalized & expected).values())
+    return true_positives, sum(normalized.values()), sum(expected.values())
+
+def run_stage_benchmark(samples: List[Tuple[bytes, List[Tuple[str, str]], Dict]]) -> Dict:
+    """Misst die einzelnen OCR-Stufen sequenziell im aktuellen Prozess"""
+    timings = {'decode': [], 'preprocess': [], 'ocr': [], 'parse': [], 'total': []}
+    totals = [0, 0, 0]
+    by_format: Dict[str, List[int]] = {}
+    engine = main.get_ocr_engine()
+    settings = dict(main.DEFAULT_OCR_SETTINGS)
+
+    for image_data, ground_truth, params in samples:
+        start = time.perf_counter()
+        image = main.open_image(image_data)
+        decoded = time.perf_counter()
+        image = main.preprocess_image(image, settings)
+        preprocessed = time.perf_counter()
+        text = engine.image_to_string(image)
+        recognized = time.perf_counter()
+        extracted = main.parse_race_results(text)
+        parsed = time.perf_counter()
+
+        timings['decode'].append(decoded - start)
+        timings['preprocess'].append(preprocessed - decoded)
+        timings['ocr'].append(recognized - preprocessed)
+        timings['parse'].append(parsed - recognized)
+        timings['total'].append(parsed - start)
+
+        result = score(extracted, ground_truth)
+        for i in range(3):
+            totals[i] += result[i]
+            by_format.setdefault(params['format'], [0, 0, 0])[i] += result[i]
+
+    return {'timings': timings, 'totals': totals, 'by_format': by_format}
+
+async def run_pool_benchmark(samples: List[Tuple[bytes, List[Tuple[str, str]], Dict]]) -> Tuple[float, List[float]]:
+    """Misst den Durchsatz des OCR-Prozess-Pools bei gleichzeitiger Last"""
+    main.start_ocr_workers()
+    # Warten, bis alle Worker ihre Engine geladen haben
+    await asyncio.gather(*(
+        asyncio.get_running_loop().run_in_executor(main.ocr_executor, main.ocr_engine_name)
+        for _ in range(main.OCR_WORKERS)
+    ))
+
+    latencies = []
+
+    async def one(image_data: bytes):
+        start = time.perf_counter()
+        await main.run_ocr(image_data)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(image_data) for image_data, _, _ in samples))
+    elapsed = time.perf_counter() - start
+    main.stop_ocr_workers()
+    return elapsed, latencies
+
+async def run_leaderboard_benchmark(samples: List[Tuple[bytes, List[Tuple[str, str]], Dict]], rest_latency: float) -> Dict:
+    """Schickt die Ground Truth durch update_leaderboard und den Edit-Scheduler"""
+    channel = FakeTextChannel(FakeREST(latency=rest_latency), 'benchmark')
+    post = channel.add_message(FakeUser('bot', bot=True), '')
+    config = main.ChannelConfig(channel.id, post.id)
+    config.leaderboard = main.Leaderboard()
+
+    latencies = []
+    for _, ground_truth, _ in samples:
+        results = [(name, name.lower(), race_time, None) for name, race_time in ground_truth]
+        start = time.perf_counter()
+        await main.update_leaderboard(channel, config, results)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await main.edit_scheduler.flush(channel.id)
+    flush_time = time.perf_counter() - start
+
+    return {
+        'latencies': latencies,
+        'flush_time': flush_time,
+        'edits': channel.edits,
+        'entries': len(config.leaderboard.entries),
+    }
+
+def run_render_benchmark(rng: random.Random, field: int, updates: int) -> Dict:
+    """Misst das Rendern eines großen Leaderboards mit Zeilen-Cache gegenüber komplettem Neuformatieren"""
+    leaderboard = main.Leaderboard()
+    for i in range(field):
+        leaderboard.submit(f"FAHRER {i}", f"user{i}", random_race_time(rng))
+    # Genug Posts für das ganze Feld, eine Zeile hat höchstens ~60 Zeichen
+    post_ids = list(range(1, field * 60 // main.LEADERBOARD_MESSAGE_LIMIT + 2))
+    renderer = main.LeaderboardRenderer()
+    renderer.sent.update(renderer.render(leaderboard.sorted_entries(), post_ids))
+
+    cached, uncached, changed_pages = [], [], []
+    for _ in range(updates):
+        # Verbesserung eines zufälligen Fahrers um bis zu zwei Sekunden
+        i = rng.randrange(field)
+        entry = leaderboard.entries[main.Leaderboard.make_identifier(f"FAHRER {i}", f"user{i}")]
+        improved_ms = max(60_000, main.time_to_milliseconds(entry['time']) - rng.randint(1, 2000))
+        minutes, rest = divmod(improved_ms, 60_000)
+        leaderboard.submit(f"FAHRER {i}", f"user{i}", f"{minutes:02d}:{rest // 1000:02d}.{rest % 1000:03d}")
+        entries = leaderboard.sorted_entries()
+
+        start = time.perf_counter()
+        pages = renderer.render(entries, post_ids)
+        cached.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        main.LeaderboardRenderer().render(entries, post_ids)
+        uncached.append(time.perf_counter() - start)
+
+        changed = renderer.changed(pages)
+        renderer.sent.update(changed)
+        changed_pages.append(len(changed))
+
+    return {'posts': len(post_ids), 'cached': cached, 'uncached': uncached, 'changed_pages': changed_pages}
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description='Offline-Benchmark für OCR und Leaderboard-Updates')
+    parser.add_argument('--images', type=int, default=30, help='Anzahl synthetischer Screenshots')
+    parser.add_argument('--seed', type=int, default=42, help='Seed für reproduzierbare Bilder')
+    parser.add_argument('--workers', type=int, default=main.OCR_WORKERS, help='Prozesse im OCR-Pool')
+    parser.add_argument('--rest-latency', type=float, default=0.05, help='Simulierte REST-Latenz in Sekunden')
+    parser.add_argument('--skip-pool', action='store_true', help='Durchsatzmessung mit Prozess-Pool überspringen')
+    parser.add_argument('--field', type=int, default=300, help='Fahrer im großen Leaderboard für die Render-Messung')
+    args = parser.parse_args()
+
+    # OCR-Logs würden die Ausgabe überfluten
+    main.logger.setLevel(logging.WARNING)
+    main.OCR_WORKERS = args.workers
+
+    fonts = load_fonts()
+    if not fonts:
+        print("Warnung: keine TrueType-Schrift gefunden, verwende PIL-Standardschrift")
+
+    rng = random.Random(args.seed)
+    render_start = time.perf_counter()
+    samples = [render_screenshot(rng, fonts) for _ in range(args.images)]
+    print(f"{len(samples)} Screenshots erzeugt in {time.perf_counter() - render_start:.1f}s")
+    print(f"OCR-Engine: {main.ocr_engine_name()}")
+
+    print("\n== OCR-Stufen (sequenziell) ==")
+    stage = run_stage_benchmark(samples)
+    for name, values in stage['timings'].items():
+        print(f"{name:<11} {percentiles(values)}")
+
+    true_positives, extracted, expected = stage['totals']
+    precision = true_positives / extracted if extracted else 0.0
+    recall = true_positives / expected if expected else 0.0
+    print(f"\nPrecision {precision:.3f} | Recall {recall:.3f} ({true_positives}/{expected} Ergebnisse erkannt)")
+    for name, (tp, ex, exp) in sorted(stage['by_format'].items()):
+        print(f"  {name:<10} Precision {tp / ex if ex else 0.0:.3f} | Recall {tp / exp if exp else 0.0:.3f}")
+
+    if not args.skip_pool:
+        print(f"\n== OCR-Prozess-Pool ({args.workers} Worker) ==")
+        elapsed, latencies = asyncio.run(run_pool_benchmark(samples))
+        print(f"{len(samples) / elapsed:.2f} Bilder/s")
+        print(f"{'job':<11} {percentiles(latencies)}")
+
+    print("\n== Leaderboard-Update ==")
+    leaderboard = asyncio.run(run_leaderboard_benchmark(samples, args.rest_latency))
+    print(f"{'update':<11} {percentiles(leaderboard['latencies'])}")
+    print(f"{leaderboard['entries']} Einträge, {leaderboard['edits']} Edits für {len(samples)} Updates, "
+          f"Flush {leaderboard['flush_time'] * 1000:.1f} ms")
+
+    print(f"\n== Leaderboard-Rendering ({args.field} Fahrer) ==")
+    render = run_render_benchmark(rng, args.field, args.images)
+    print(f"{'cache':<11} {percentiles(render['cached'])}")
+    print(f"{'ohne cache':<11} {percentiles(render['uncached'])}")
+    print(f"Ø {statistics.mean(render['changed_pages']):.1f} von {render['posts']} Posts pro Update geändert")
+
+if __name__ == '__main__':
+    main_benchmark()
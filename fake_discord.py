@@ -0,0 +1,207 @@
+"""Lokaler Discord-Ersatz für Last- und Benchmark-Tests
+
+Stellt Channels, Nachrichten, Anhänge und Benutzer im Speicher bereit, die die von
+main.py genutzte Schnittstelle von discord.py nachbilden. REST-Aufrufe haben eine
+konfigurierbare Latenz, Edits, Reaktionen und gesendete Nachrichten unterliegen
+einem simulierten Rate-Limit pro Channel. Je Route wartet ein voller Bucket wie
+discord.py ab oder löst wie oberhalb von max_ratelimit_timeout discord.RateLimited aus.
+So laufen on_message, process_images, update_leaderboard und end_challenge
+unverändert, ohne Verbindung zu Discord.
+"""
+import asyncio
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+import discord
+
+_last_snowflake = 0
+
+def next_snowflake() -> int:
+    """Eindeutige ID mit aktuellem Zeitstempel, wie bei Discord steckt die Erstellungszeit in der ID"""
+    global _last_snowflake
+    _last_snowflake = max(_last_snowflake + 1, discord.utils.time_snowflake(datetime.now(timezone.utc)))
+    return _last_snowflake
+
+class FakeResponse:
+    """Minimale HTTP-Antwort für discord.HTTPException"""
+    def __init__(self, status: int, reason: str):
+        self.status = status
+        self.reason = reason
+
+class FakeREST:
+    """Simulierte REST-API: Latenz, Rate-Limits pro Route und Channel sowie Aufrufstatistik"""
+    def __init__(self, latency: float = 0.05, edit_limit: int = 5, edit_window: float = 5.0,
+                 reaction_limit: int = 4, reaction_window: float = 1.0, raise_routes: Iterable[str] = ()):
+        self.latency = latency
+        self.raise_routes = set(raise_routes)  # Routen, die bei vollem Bucket RateLimited auslösen statt zu warten
+        # route -> (Aufrufe, Fenster in Sekunden), angelehnt an die Limits von Discord
+        self.limits: Dict[str, Tuple[int, float]] = {
+            'edit_message': (edit_limit, edit_window),
+            'add_reaction': (reaction_limit, reaction_window),
+            'send_message': (5, 5.0),
+        }
+        self.buckets: Dict[Tuple[str, int], Deque[float]] = {}
+        self.calls: Dict[str, int] = {}
+        self.rate_limited = 0
+
+    async def request(self, route: str, channel_id: Optional[int] = None):
+        """Simuliert einen REST-Aufruf, bei vollem Bucket wird wie in discord.py gewartet"""
+        self.calls[route] = self.calls.get(route, 0) + 1
+        if route in self.limits and channel_id is not None:
+            limit, window = self.limits[route]
+            loop = asyncio.get_running_loop()
+            timestamps = self.buckets.setdefault((route, channel_id), deque())
+            while True:
+                now = loop.time()
+                while timestamps and now - timestamps[0] >= window:
+                    timestamps.popleft()
+                if len(timestamps) < limit:
+                    timestamps.append(now)
+                    break
+                self.rate_limited += 1
+                retry_after = window - (now - timestamps[0])
+                if route in self.raise_routes:
+                    # 429 mit retry_after über max_ratelimit_timeout: discord.py gibt den Fehler weiter
+                    await asyncio.sleep(self.latency)
+                    raise discord.RateLimited(retry_after)
+                # 429: discord.py wartet retry_after ab und wiederholt den Aufruf
+                await asyncio.sleep(retry_after)
+        await asyncio.sleep(self.latency)
+
+class FakeUser:
+    def __init__(self, name: str, bot: bool = False, user_id: Optional[int] = None):
+        self.id = user_id or next_snowflake()
+        self.name = name
+        self.display_name = name
+        self.bot = bot
+        self.mention = f"<@{self.id}>"
+
+    def __eq__(self, other):
+        return getattr(other, 'id', None) == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __str__(self):
+        return self.name
+
+class FakeAttachment:
+    def __init__(self, rest: FakeREST, filename: str, data: bytes, width: Optional[int] = None, height: Optional[int] = None):
+        self.rest = rest
+        self.id = next_snowflake()
+        self.filename = filename
+        self.data = data
+        self.size = len(data)
+        self.width = width
+        self.height = height
+
+    async def read(self) -> bytes:
+        await self.rest.request('attachment_read')
+        return self.data
+
+class FakeMessage:
+    def __init__(self, channel: 'FakeTextChannel', author: FakeUser, content: str = '',
+                 attachments: Optional[List[FakeAttachment]] = None):
+        self.id = next_snowflake()
+        self.channel = channel
+        self.author = author
+        self.content = content
+        self.attachments = attachments or []
+        self.created_at = discord.utils.snowflake_time(self.id)
+        self.reactions: List[str] = []
+        self.reacted_at: Optional[float] = None
+        # Von commands.Context erwartet, Commands werden im Lasttest nicht ausgeführt
+        self._state = None
+        self.guild = None
+
+    async def edit(self, content: str):
+        await self.channel.rest.request('edit_message', self.channel.id)
+        self.content = content
+        self.channel.edits += 1
+
+    async def add_reaction(self, emoji: str):
+        await self.channel.rest.request('add_reaction', self.channel.id)
+        self.reactions.append(emoji)
+        self.reacted_at = asyncio.get_running_loop().time()
+
+class FakePartialMessage:
+    def __init__(self, channel: 'FakeTextChannel', message_id: int):
+        self.channel = channel
+        self.id = message_id
+
+    async def edit(self, content: str):
+        message = self.channel.messages.get(self.id)
+        if message is None:
+            raise discord.NotFound(FakeResponse(404, 'Not Found'), 'Unknown Message')
+        await message.edit(content=content)
+
+class FakeTextChannel:
+    def __init__(self, rest: FakeREST, name: str, channel_id: Optional[int] = None):
+        self.rest = rest
+        self.id = channel_id or next_snowflake()
+        self.name = name
+        self.mention = f"<#{self.id}>"
+        self.messages: Dict[int, FakeMessage] = {}
+        self.edits = 0
+
+    def add_message(self, author: FakeUser, content: str = '', attachments: Optional[List[FakeAttachment]] = None) -> FakeMessage:
+        """Legt eine Nachricht an, ohne einen REST-Aufruf zu simulieren (z.B. Posts von Benutzern)"""
+        message = FakeMessage(self, author, content, attachments)
+        self.messages[message.id] = message
+        return message
+
+    async def send(self, content: str) -> FakeMessage:
+        await self.rest.request('send_message', self.id)
+        return self.add_message(FakeUser('bot', bot=True), content)
+
+    async def fetch_message(self, message_id: int) -> FakeMessage:
+        await self.rest.request('fetch_message')
+        message = self.messages.get(message_id)
+        if message is None:
+            raise discord.NotFound(FakeResponse(404, 'Not Found'), 'Unknown Message')
+        return message
+
+    def get_partial_message(self, message_id: int) -> FakePartialMessage:
+        return FakePartialMessage(self, message_id)
+
+    async def history(self, limit: Optional[int] = None, after: Optional[datetime] = None, oldest_first: bool = False, **kwargs):
+        await self.rest.request('history')
+        messages = sorted(self.messages.values(), key=lambda message: message.created_at, reverse=not oldest_first)
+        count = 0
+        for message in messages:
+            if after is not None and message.created_at <= after:
+                continue
+            if limit is not None and count >= limit:
+                break
+            count += 1
+            yield message
+
+class FakeGateway:
+    """Verbindet die Fake-Channels mit dem Bot aus main.py und liefert Events aus"""
+    def __init__(self, bot, rest: FakeREST):
+        self.bot = bot
+        self.rest = rest
+        self.channels: Dict[int, FakeTextChannel] = {}
+        self.user = FakeUser('ChallengeBot', bot=True)
+        self.tasks: List[asyncio.Task] = []
+
+        # Der Bot sieht die Fake-Channels über die üblichen Lookups
+        bot.get_channel = self.channels.get
+        bot._connection.user = self.user
+
+    def create_channel(self, name: str) -> FakeTextChannel:
+        channel = FakeTextChannel(self.rest, name)
+        self.channels[channel.id] = channel
+        return channel
+
+    def dispatch_message(self, message: FakeMessage, handler) -> asyncio.Task:
+        """Liefert ein MESSAGE_CREATE aus, wie discord.py in einem eigenen Task"""
+        task = asyncio.create_task(handler(message))
+        self.tasks.append(task)
+        return task
+
+    async def wait_for_dispatch(self):
+        if self.tasks:
+            await asyncio.gather(*self.tasks)
+            self.tasks.clear()
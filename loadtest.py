@@ -0,0 +1,253 @@
+"""Lasttest des Bots gegen einen lokalen Discord-Ersatz
+
+Spielt N Channels × M Screenshots pro Minute gegen fake_discord ab. Nachrichten laufen
+unverändert durch on_message, die OCR-Queue, process_images, update_leaderboard, den
+Edit-Scheduler und am Ende end_challenge. Gemessen werden der dauerhafte Durchsatz,
+die Latenz vom Post bis zur Reaktion, die Wartezeit auf die Channel-Locks sowie
+REST-Aufrufe, Edits und simulierte 429er.
+
+Mit --fake-ocr-ms ersetzt eine Fake-Engine Tesseract: sie wartet die angegebene Zeit
+und liefert den im PNG hinterlegten Ground-Truth-Text. So lässt sich der Bot ohne
+installiertes Tesseract und unabhängig von der Erkennungsqualität belasten.
+
+Beispiel:
+    python loadtest.py --channels 8 --rate 30 --duration 120 --fake-ocr-ms 300
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw
+from PIL.PngImagePlugin import PngInfo
+
+import benchmark
+import main
+from fake_discord import FakeAttachment, FakeGateway, FakeREST, FakeUser
+
+class FakeOCREngine(main.OCREngine):
+    """Simuliert die OCR-Dauer und liefert den im Bild hinterlegten Text"""
+    name = 'fake'
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def image_to_string(self, image: Image.Image) -> str:
+        time.sleep(self.delay)
+        return image.info.get('ocr_text', '')
+
+class FakeOCREngineFactory:
+    """Picklebare Factory für den Initializer des Prozess-Pools"""
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def __call__(self) -> FakeOCREngine:
+        return FakeOCREngine(self.delay)
+
+def render_fake_screenshot(rng: random.Random) -> Tuple[bytes, List[Tuple[str, str]]]:
+    """Kleines PNG mit zufälligem Muster (kein Cache-Treffer) und Ground Truth als Text-Chunk"""
+    image = Image.new('RGB', (320, 180), (18, 18, 28))
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.randrange(320), rng.randrange(180)
+        color = tuple(rng.randrange(256) for _ in range(3))
+        draw.rectangle((x, y, x + rng.randint(20, 120), y + rng.randint(20, 80)), fill=color)
+
+    ground_truth = [
+        (name, benchmark.random_race_time(rng))
+        for name in rng.sample(benchmark.DRIVER_NAMES, rng.randint(1, 3))
+    ]
+    info = PngInfo()
+    info.add_text('ocr_text', 'RACER ZEIT\n' + '\n'.join(f"{name} | {race_time}" for name, race_time in ground_truth))
+    buffer = BytesIO()
+    image.save(buffer, format='PNG', pnginfo=info)
+    return buffer.getvalue(), ground_truth
+
+def render_samples(count: int, seed: int, fake_ocr: bool) -> List[bytes]:
+    rng = random.Random(seed)
+    if fake_ocr:
+        return [render_fake_screenshot(rng)[0] for _ in range(count)]
+    fonts = benchmark.load_fonts()
+    return [benchmark.render_screenshot(rng, fonts)[0] for _ in range(count)]
+
+async def sample_queue_depth(samples: List[int], interval: float = 0.5):
+    while True:
+        samples.append(main.ocr_scheduler.qsize() if main.ocr_scheduler else 0)
+        await asyncio.sleep(interval)
+
+async def run_load(args, images: List[bytes], engine_factory: Optional[FakeOCREngineFactory]) -> Dict:
+    rest = FakeREST(latency=args.rest_latency, edit_limit=args.edit_limit, edit_window=args.edit_window,
+                    reaction_limit=args.reaction_limit, reaction_window=args.reaction_window,
+                    # Edits wie bei langem retry_after als RateLimited, damit die Wiederholung im Edit-Scheduler greift
+                    raise_routes=() if args.wait_on_429 else ('edit_message',))
+    gateway = FakeGateway(main.bot, rest)
+    remote_workers = []
+    if args.remote:
+        # Getrennte OCR-Worker-Prozesse über einen Unix-Socket, wie mit python main.py worker
+        main.OCR_WORKER_LISTEN = os.path.join(os.getcwd(), 'ocr.sock')
+        main.OCR_WORKER_AUTHKEY = 'loadtest'
+        main.start_ocr_workers()
+        remote_workers = [
+            multiprocessing.Process(
+                target=main.run_remote_worker,
+                args=(main.OCR_WORKER_LISTEN, b'loadtest', engine_factory or main.create_ocr_engine),
+                daemon=True
+            )
+            for _ in range(args.workers)
+        ]
+        for process in remote_workers:
+            process.start()
+    elif engine_factory is not None:
+        # Der Pool wird vor setup_hook gestartet, damit er die Fake-Engine verwendet
+        main.start_ocr_workers(engine_factory)
+    await main.setup_hook()
+
+    # Channel-Namen ohne Datum: kein Challenge-Ende während des Laufs
+    channels = []
+    for i in range(args.channels):
+        channel = gateway.create_channel(f"lasttest-{i + 1}")
+        post = channel.add_message(gateway.user, "Stand: -")
+        config = main.ChannelConfig(channel.id, post.id)
+        if args.fake_ocr_ms is not None:
+            config.ocr_settings = {'preprocess': False}
+        main.save_channel_config(config)
+        channels.append(channel)
+    await main.on_ready()
+    if args.deadline:
+        # Gestaffelte Challenge-Enden während der Lastphase
+        for i, channel in enumerate(channels):
+            deadline = datetime.now(main.GERMAN_TZ) + timedelta(seconds=args.deadline * (i + 1) / args.channels)
+            main.deadline_scheduler.set_deadline(channel.id, deadline)
+
+    users = [FakeUser(f"fahrer{i}") for i in range(args.channels * 10)]
+    rng = random.Random(args.seed)
+    loop = asyncio.get_running_loop()
+    queue_depths: List[int] = []
+    sampler = asyncio.create_task(sample_queue_depth(queue_depths))
+
+    # Poisson-Ankünfte über alle Channels, die Reihenfolge der Bilder ist fest
+    posted: List[Tuple[object, float]] = []
+    total_rate = args.channels * args.rate / 60
+    start = loop.time()
+    next_post = start
+    for image_data in images:
+        next_post += rng.expovariate(total_rate)
+        delay = next_post - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        channel = rng.choice(channels)
+        attachment = FakeAttachment(rest, 'screenshot.png', image_data)
+        message = channel.add_message(rng.choice(users), attachments=[attachment])
+        posted.append((message, loop.time()))
+        gateway.dispatch_message(message, main.on_message)
+    posting_done = loop.time()
+
+    # Alles abarbeiten lassen, dann Edits schreiben und die übrigen Challenges beenden
+    await gateway.wait_for_dispatch()
+    await main.ocr_scheduler.join()
+    drained = loop.time()
+    sampler.cancel()
+    if main.deadline_scheduler.ending:
+        await asyncio.gather(*main.deadline_scheduler.ending)
+    for channel in channels:
+        config = main.get_channel_config(channel.id)
+        if config.is_active:
+            await main.end_challenge(channel, config)
+    finished = loop.time()
+    main.stop_ocr_workers()
+    for process in remote_workers:
+        process.terminate()
+    main.flush_configs.cancel()
+    main.save_ocr_cache.cancel()
+    main.flush_channel_configs()
+
+    latencies = [message.reacted_at - posted_at for message, posted_at in posted if message.reacted_at is not None]
+    late = sum(
+        not main.deadline_scheduler.is_open(message.channel.id, message.created_at) for message, _ in posted
+    )
+    return {
+        'posted': len(posted),
+        'reacted': len(latencies),
+        'late': late,
+        'latencies': latencies,
+        'posting_time': posting_done - start,
+        'drain_time': drained - start,
+        'end_time': finished - drained,
+        'queue_depths': queue_depths,
+        'rest': rest,
+        'edits': sum(channel.edits for channel in channels),
+        'entries': sum(len(main.get_channel_config(channel.id).leaderboard.entries) for channel in channels),
+    }
+
+def main_loadtest():
+    parser = argparse.ArgumentParser(description='Lasttest gegen einen lokalen Discord-Ersatz')
+    parser.add_argument('--channels', type=int, default=4, help='Anzahl Challenge-Channels')
+    parser.add_argument('--rate', type=float, default=10, help='Screenshots pro Minute und Channel')
+    parser.add_argument('--duration', type=float, default=60, help='Dauer der Lastphase in Sekunden')
+    parser.add_argument('--seed', type=int, default=42, help='Seed für Bilder und Ankunftszeiten')
+    parser.add_argument('--workers', type=int, default=main.OCR_WORKERS, help='Prozesse im OCR-Pool')
+    parser.add_argument('--rest-latency', type=float, default=0.05, help='Simulierte REST-Latenz in Sekunden')
+    parser.add_argument('--edit-limit', type=int, default=5, help='Edits pro Fenster und Channel bis zum 429')
+    parser.add_argument('--edit-window', type=float, default=5.0, help='Rate-Limit-Fenster für Edits in Sekunden')
+    parser.add_argument('--reaction-limit', type=int, default=4, help='Reaktionen pro Fenster und Channel bis zum 429')
+    parser.add_argument('--reaction-window', type=float, default=1.0, help='Rate-Limit-Fenster für Reaktionen in Sekunden')
+    parser.add_argument('--wait-on-429', action='store_true',
+                        help='Bei vollem Edit-Bucket warten statt discord.RateLimited auszulösen')
+    parser.add_argument('--deadline', type=float, default=None,
+                        help='Challenge-Enden gestaffelt bis zu dieser Anzahl Sekunden nach dem Start')
+    parser.add_argument('--remote', action='store_true',
+                        help='OCR in getrennten Worker-Prozessen über einen Unix-Socket statt im Prozess-Pool')
+    parser.add_argument('--fake-ocr-ms', type=float, default=None,
+                        help='Fake-Engine statt Tesseract mit dieser OCR-Dauer in Millisekunden')
+    args = parser.parse_args()
+
+    # OCR- und Update-Logs würden die Ausgabe überfluten
+    main.logger.setLevel(logging.WARNING)
+    main.OCR_WORKERS = args.workers
+    engine_factory: Optional[FakeOCREngineFactory] = None
+    if args.fake_ocr_ms is not None:
+        engine_factory = FakeOCREngineFactory(args.fake_ocr_ms / 1000)
+
+    count = max(1, round(args.channels * args.rate * args.duration / 60))
+    render_start = time.perf_counter()
+    images = render_samples(count, args.seed, engine_factory is not None)
+    print(f"{count} Screenshots erzeugt in {time.perf_counter() - render_start:.1f}s")
+
+    # Konfigurationen und Cache landen in einem temporären Verzeichnis
+    workdir = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='loadtest-') as tmp:
+        os.chdir(tmp)
+        try:
+            result = asyncio.run(run_load(args, images, engine_factory))
+        finally:
+            os.chdir(workdir)
+
+    print(f"\n== Last: {args.channels} Channels × {args.rate:g} Screenshots/min, {args.workers} OCR-Worker ==")
+    print(f"{result['posted']} Nachrichten in {result['posting_time']:.1f}s gepostet, "
+          f"{result['reacted']} mit Reaktion, abgearbeitet nach {result['drain_time']:.1f}s")
+    if args.deadline:
+        print(f"Deadline    {result['late']} Nachrichten nach dem Challenge-Ende gepostet (ignoriert)")
+    print(f"Durchsatz   {result['posted'] / result['drain_time']:.2f} Nachrichten/s "
+          f"(angeboten {args.channels * args.rate / 60:.2f}/s)")
+    print(f"Post→Reaktion {benchmark.percentiles(result['latencies'])}")
+    lock_wait = main.metrics.histograms.get('lock_wait')
+    if lock_wait:
+        print(f"Lock-Wait   Ø {lock_wait.total / lock_wait.count * 1000:.1f} ms | p95 ≤ {lock_wait.quantile(0.95) * 1000:.0f} ms "
+              f"| p99 ≤ {lock_wait.quantile(0.99) * 1000:.0f} ms ({lock_wait.count} Sperren)")
+    if result['queue_depths']:
+        print(f"OCR-Queue   max {max(result['queue_depths'])} | Mittel {sum(result['queue_depths']) / len(result['queue_depths']):.1f}")
+    rest = result['rest']
+    calls = ', '.join(f"{route} {count}" for route, count in sorted(rest.calls.items()))
+    print(f"REST        {sum(rest.calls.values())} Aufrufe ({calls})")
+    print(f"Edits       {result['edits']} Leaderboard-Edits, {rest.rate_limited} simulierte 429er")
+    print(f"Endstand    {args.channels} Challenges in {result['end_time'] * 1000:.0f} ms beendet, {result['entries']} Einträge")
+
+if __name__ == '__main__':
+    main_loadtest()
@@ -1,17 +1,38 @@
 import discord
 from discord.ext import commands, tasks
 import pytesseract
-from PIL import Image
+from PIL import Image, ImageChops, ImageOps, ImageStat
 import re
 import json
 import os
 import asyncio
 from datetime import datetime, time
 import pytz
-from typing import Dict, List, Optional, Tuple
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 import logging
 from io import BytesIO
 import threading
+import sqlite3
+import hashlib
+import heapq
+import unicodedata
+import base64
+from collections import OrderedDict, deque
+from bisect import bisect_left, insort
+from contextlib import asynccontextmanager, contextmanager
+from time import perf_counter, sleep
+from aiohttp import web
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from multiprocessing.connection import AuthenticationError, Client, Listener
+import multiprocessing
+import queue
+import sys
+import abc
+
+try:
+    import tesserocr  # Optional: hält Tesseract-Modelle im Speicher
+except ImportError:
+    tesserocr = None
 
 # Logging konfigurieren
 logging.basicConfig(
@@ -27,13 +48,389 @@ logger = logging.getLogger(__name__)
 # Bot Setup
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix='!', intents=intents)
+# Mit BOT_SHARDED verteilt AutoShardedBot die Guilds automatisch auf mehrere Gateway-Shards
+BOT_SHARDED = os.getenv('BOT_SHARDED', '').lower() in ('1', 'true', 'yes')
+bot_class = commands.AutoShardedBot if BOT_SHARDED else commands.Bot
+# Lange Rate-Limits nicht still abwarten, sondern im Edit-Scheduler behandeln
+bot = bot_class(command_prefix='!', intents=intents, max_ratelimit_timeout=30.0)
 
 # Globale Variablen
 update_locks = {}  # Channel-spezifische Locks für Thread-Sicherheit
 GERMAN_TZ = pytz.timezone('Europe/Berlin')
 CHALLENGE_END_TIME = time(19, 0)  # 19:00 Uhr
 
+# OCR Worker-Pool
+OCR_WORKERS = int(os.getenv('OCR_WORKERS', os.cpu_count() or 1))
+OCR_QUEUE_SIZE = int(os.getenv('OCR_QUEUE_SIZE', '100'))
+OCR_CHANNEL_QUOTA = int(os.getenv('OCR_CHANNEL_QUOTA', str(max(1, OCR_QUEUE_SIZE // 4))))
+OCR_DRAIN_TIMEOUT = float(os.getenv('OCR_DRAIN_TIMEOUT', '120'))  # Sekunden, die end_challenge auf ausstehende OCR wartet
+ocr_executor: Optional[Executor] = None  # lokaler Prozess-Pool oder RemoteOCRExecutor
+
+# Getrennte OCR-Worker: der Bot lauscht auf OCR_WORKER_LISTEN, Worker (python main.py worker) verbinden sich mit OCR_WORKER_ADDRESS
+OCR_WORKER_LISTEN = os.getenv('OCR_WORKER_LISTEN')  # z.B. /tmp/carrera-ocr.sock oder 0.0.0.0:7000
+OCR_WORKER_ADDRESS = os.getenv('OCR_WORKER_ADDRESS')  # z.B. /tmp/carrera-ocr.sock oder carrera-bot:7000
+OCR_WORKER_AUTHKEY = os.getenv('OCR_WORKER_AUTHKEY')
+OCR_WORKER_RETRY_SECONDS = 5.0
+OCR_JOB_MAX_ATTEMPTS = 3  # Verbindungsabbrüche, nach denen ein Job nicht mehr neu verteilt wird
+OCR_JOB_TIMEOUT = float(os.getenv('OCR_JOB_TIMEOUT', '60'))  # Sekunden, die ein Worker für einen Job brauchen darf
+ocr_scheduler: Optional['OCRJobScheduler'] = None
+ocr_worker_tasks: List[asyncio.Task] = []
+
+# Channel-Konfigurationen im Speicher, Änderungen werden gebündelt geschrieben
+CONFIG_FLUSH_INTERVAL = float(os.getenv('CONFIG_FLUSH_INTERVAL', '5'))
+channel_configs = {}  # channel_id -> ChannelConfig
+dirty_configs = set()  # channel_ids mit ungespeicherten Änderungen
+pending_results: List[Dict] = []  # übernommene Zeiten, werden mit den Konfigurationen geschrieben
+removed_channels = set()  # entfernte channel_ids: weder ältere Schnappschüsse noch laufende Jobs dürfen sie wieder anlegen, nur !add_challenge
+pending_deletes = set()  # entfernte channel_ids, werden beim nächsten Schreiben gelöscht
+flush_lock = threading.Lock()  # Schreibvorgänge nacheinander, sonst überholt ein Löschen einen älteren Schnappschuss
+
+# Speicher-Backend: 'sqlite' (Standard) oder 'json' (eine Datei pro Channel)
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'sqlite')
+DATABASE_FILE = os.getenv('DATABASE_FILE', 'challenge_bot.db')
+storage = None  # siehe open_storage()
+
+# Leaderboard-Edits: Änderungen pro Channel werden innerhalb des Fensters zusammengefasst
+EDIT_DEBOUNCE_SECONDS = float(os.getenv('EDIT_DEBOUNCE_SECONDS', '2'))
+MAX_CONCURRENT_EDITS = int(os.getenv('MAX_CONCURRENT_EDITS', '5'))
+# Discord erlaubt höchstens 2000 Zeichen pro Nachricht, größere Leaderboards werden auf mehrere Posts verteilt
+LEADERBOARD_MESSAGE_LIMIT = int(os.getenv('LEADERBOARD_MESSAGE_LIMIT', '2000'))
+
+# Metriken: lokaler Prometheus-Endpunkt (0 = deaktiviert)
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+
+# Backfill: parallele OCR-Jobs beim Nachlesen des Verlaufs
+BACKFILL_CONCURRENCY = int(os.getenv('BACKFILL_CONCURRENCY', str(OCR_WORKERS)))
+BACKFILL_PROGRESS_INTERVAL = 5  # Sekunden zwischen Fortschrittsmeldungen
+
+# Maximale Anzahl gleichzeitig verarbeiteter Bilder einer Nachricht
+MESSAGE_OCR_CONCURRENCY = int(os.getenv('MESSAGE_OCR_CONCURRENCY', '4'))
+
+# Fahrer-Zuordnung: Mindest-Konfidenz für unscharfe Treffer (1.0 = nur exakte Treffer)
+DRIVER_MATCH_MIN_CONFIDENCE = float(os.getenv('DRIVER_MATCH_MIN_CONFIDENCE', '0.85'))
+
+# Grenzen für Anhänge, werden vor dem Dekodieren geprüft
+MAX_ATTACHMENT_BYTES = int(os.getenv('MAX_ATTACHMENT_BYTES', str(10 * 1024 * 1024)))
+MAX_IMAGE_PIXELS = int(os.getenv('MAX_IMAGE_PIXELS', str(25_000_000)))
+Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+
+# OCR-Engine (auto, tesserocr, pytesseract)
+OCR_ENGINE = os.getenv('OCR_ENGINE', 'auto')
+OCR_LANG = 'deu+eng'
+OCR_CHAR_WHITELIST = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyzÄÖÜäöüß:.| '
+ocr_engine = None  # Engine des aktuellen Prozesses, siehe get_ocr_engine()
+
+# Bildvorverarbeitung vor der OCR, pro Channel überschreibbar (siehe !ocr_settings)
+DEFAULT_OCR_SETTINGS = {
+    'preprocess': True,         # Vorverarbeitung aktiv
+    'crop': None,               # None, 'auto' oder [links, oben, rechts, unten] als Anteile 0..1
+    'threshold': 'otsu',        # 'otsu' oder fester Schwellwert 0-255
+    'target_text_height': 32,   # Zielhöhe einer Textzeile in Pixeln
+    'debug': False              # Zwischenbilder in OCR_DEBUG_DIR ablegen
+}
+OCR_DEBUG_DIR = os.getenv('OCR_DEBUG_DIR', 'ocr_debug')
+
+# Cache für OCR-Ergebnisse von erneut geposteten Screenshots
+OCR_CACHE_SIZE = int(os.getenv('OCR_CACHE_SIZE', '1000'))
+OCR_CACHE_MAX_DISTANCE = int(os.getenv('OCR_CACHE_MAX_DISTANCE', '6'))  # Hamming-Distanz des 64-Bit dHash
+OCR_CACHE_THUMBNAIL_WIDTH = 256
+OCR_CACHE_MAX_PIXEL_DIFF = 45  # Maximale Blockabweichung der Vorschaubilder (0-255)
+OCR_CACHE_FILE = os.getenv('OCR_CACHE_FILE')  # Optional: Cache über Neustarts behalten
+
+class Histogram:
+    """Latenz-Histogramm mit festen Buckets (Prometheus-kompatibel)"""
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)  # letzter Bucket: +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Obere Bucket-Grenze, unter der der Anteil q der Werte liegt"""
+        target = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.BUCKETS, self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return float('inf')
+
+class Metrics:
+    """Latenzen pro Verarbeitungsstufe, Zähler und Warteschlangen-Größen"""
+    def __init__(self):
+        self.histograms: Dict[str, Histogram] = {}  # stage -> Histogram
+        self.counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], int] = {}
+        self.gauges: Dict[str, Callable[[], float]] = {}
+
+    def observe(self, stage: str, seconds: float):
+        if stage not in self.histograms:
+            self.histograms[stage] = Histogram()
+        self.histograms[stage].observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, perf_counter() - start)
+
+    def increment(self, name: str, amount: int = 1, **labels):
+        key = (name, tuple(sorted((label, str(value)) for label, value in labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def register_gauge(self, name: str, callback: Callable[[], float]):
+        self.gauges[name] = callback
+
+    def render_prometheus(self) -> str:
+        """Text-Format für den /metrics Endpunkt"""
+        lines = ['# TYPE carrera_stage_seconds histogram']
+        for stage, histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(Histogram.BUCKETS + (float('inf'),), histogram.counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'carrera_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'carrera_stage_seconds_sum{{stage="{stage}"}} {histogram.total}')
+            lines.append(f'carrera_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+        for name in sorted({name for name, _ in self.counters}):
+            lines.append(f'# TYPE carrera_{name} counter')
+            for (counter_name, labels), value in sorted(self.counters.items()):
+                if counter_name == name:
+                    label_text = ','.join(f'{label}="{value}"' for label, value in labels)
+                    lines.append(f'carrera_{name}{{{label_text}}} {value}')
+
+        for name, callback in sorted(self.gauges.items()):
+            lines.append(f'# TYPE carrera_{name} gauge')
+            lines.append(f'carrera_{name} {callback()}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> str:
+        """Kurzübersicht für den !stats Command"""
+        lines = ['**Latenzen pro Stufe:**']
+        for stage, histogram in sorted(self.histograms.items()):
+            average = histogram.total / histogram.count * 1000
+            lines.append(f"• `{stage}`: {histogram.count}x, Ø {average:.0f} ms, p95 ≤ {histogram.quantile(0.95) * 1000:.0f} ms")
+
+        lines.append('**Warteschlangen:**')
+        for name, callback in sorted(self.gauges.items()):
+            lines.append(f"• `{name}`: {callback():g}")
+
+        ocr_counts: Dict[str, Dict[str, int]] = {}
+        for (name, labels), value in self.counters.items():
+            if name == 'ocr_images_total':
+                label_map = dict(labels)
+                ocr_counts.setdefault(label_map['channel'], {})[label_map['status']] = value
+        if ocr_counts:
+            lines.append('**OCR pro Channel:**')
+            for channel_id, counts in sorted(ocr_counts.items()):
+                details = ', '.join(f"{status}: {count}" for status, count in sorted(counts.items()))
+                lines.append(f"• <#{channel_id}>: {details}")
+        return '\n'.join(lines)
+
+metrics = Metrics()
+
+class Leaderboard:
+    """Leaderboard eines Channels: Einträge nach Identifier indiziert, Reihenfolge nach Zeit sortiert"""
+    def __init__(self):
+        self.entries: Dict[str, Dict] = {}  # identifier -> Eintrag
+        self._order: List[Tuple[int, str]] = []  # (time_ms, identifier), aufsteigend sortiert
+
+    @staticmethod
+    def make_identifier(driver_name: str, discord_user: Optional[str]) -> str:
+        return f"{driver_name}_{discord_user}" if discord_user else driver_name
+
+    @staticmethod
+    def make_display_name(driver_name: str, discord_user: Optional[str]) -> str:
+        if discord_user and driver_name.lower() != discord_user.lower():
+            return f"{driver_name} ({discord_user})"
+        return driver_name
+
+    def submit(self, driver_name: str, discord_user: Optional[str], race_time: str) -> Optional[str]:
+        """Trägt eine Zeit ein, liefert 'new', 'improved' oder None (keine Verbesserung)"""
+        identifier = self.make_identifier(driver_name, discord_user)
+        time_ms = time_to_milliseconds(race_time)
+        entry = self.entries.get(identifier)
+
+        if entry:
+            # Nur bessere Zeit übernehmen
+            if time_ms >= entry['time_ms']:
+                return None
+            del self._order[bisect_left(self._order, (entry['time_ms'], identifier))]
+            entry['time'] = race_time
+            entry['time_ms'] = time_ms
+            status = 'improved'
+        else:
+            self.entries[identifier] = {
+                'identifier': identifier,
+                'driver_name': driver_name,
+                'discord_user': discord_user,
+                'display_name': self.make_display_name(driver_name, discord_user),
+                'time': race_time,
+                'time_ms': time_ms
+            }
+            status = 'new'
+
+        insort(self._order, (time_ms, identifier))
+        return status
+
+    def sorted_entries(self) -> List[Dict]:
+        return [self.entries[identifier] for _, identifier in self._order]
+
+    def to_list(self) -> List[Dict]:
+        return [
+            {'driver_name': entry['driver_name'], 'discord_user': entry['discord_user'], 'time': entry['time']}
+            for entry in self.sorted_entries()
+        ]
+
+    @classmethod
+    def from_list(cls, data: List[Dict]) -> 'Leaderboard':
+        leaderboard = cls()
+        for entry in data:
+            leaderboard.submit(entry['driver_name'], entry.get('discord_user'), entry['time'])
+        return leaderboard
+
+    @classmethod
+    def from_parsed(cls, entries: List[Dict], driver_mappings: Dict[str, str]) -> 'Leaderboard':
+        """Baut das Leaderboard aus dem geparsten Discord-Post auf"""
+        leaderboard = cls()
+        for entry in entries:
+            driver_name = entry['driver_name']
+            # Ohne Klammer im Post ist der Discord-User nur über die Zuordnung bekannt
+            discord_user = entry['discord_user'] or driver_mappings.get(driver_name)
+            leaderboard.submit(driver_name, discord_user, entry['time'])
+        return leaderboard
+
+# Typische OCR-Verwechslungen, werden nur für die unscharfe Suche vereinheitlicht
+OCR_CONFUSABLES = str.maketrans({'0': 'o', '1': 'i', 'l': 'i', '|': 'i', '5': 's', '8': 'b'})
+
+def normalize_driver_name(name: str) -> str:
+    """Schlüssel für den Namensvergleich: Groß-/Kleinschreibung, Umlaute und Leerzeichen vereinheitlicht"""
+    name = unicodedata.normalize('NFKD', name.casefold())
+    name = ''.join(char for char in name if not unicodedata.combining(char))
+    return ' '.join(name.split())
+
+def fold_confusables(key: str) -> str:
+    """Vereinheitlicht OCR-Verwechslungen, z.B. MAX1 und MAXI ergeben denselben Suchschlüssel"""
+    return key.translate(OCR_CONFUSABLES)
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein-Distanz"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        previous = current
+    return previous[-1]
+
+class BKTree:
+    """BK-Baum für die Suche nach Schlüsseln mit begrenzter Editierdistanz"""
+    def __init__(self):
+        self.root = None  # (schlüssel, {distanz: knoten})
+
+    def add(self, key: str):
+        if self.root is None:
+            self.root = (key, {})
+            return
+        node = self.root
+        while True:
+            distance = edit_distance(key, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (key, {})
+                return
+            node = child
+
+    def search(self, key: str, max_distance: int) -> List[Tuple[int, str]]:
+        results = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node_key, children = stack.pop()
+            distance = edit_distance(key, node_key)
+            if distance <= max_distance:
+                results.append((distance, node_key))
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return sorted(results)
+
+class DriverIndex:
+    """Index der bekannten Fahrer eines Channels: O(1) für normalisierte Treffer, BK-Baum für Tippfehler
+
+    Bekannte Namen werden ohne OCR-Verwechslungen indiziert, damit z.B. MAX1 und MAXI
+    verschiedene Fahrer bleiben. Nur die unscharfe Suche vereinheitlicht Verwechslungen
+    und ordnet nur zu, wenn genau ein Fahrer in Frage kommt.
+    """
+    def __init__(self, driver_names=()):
+        self.exact: Dict[str, str] = {}  # normalisierter Schlüssel -> Fahrername
+        self.folded: Dict[str, List[str]] = {}  # Suchschlüssel ohne Verwechslungen -> Fahrernamen
+        self.tree = BKTree()
+        for driver_name in driver_names:
+            self.add(driver_name)
+
+    def add(self, driver_name: str):
+        key = normalize_driver_name(driver_name)
+        if not key:
+            return
+        if key in self.exact:
+            if self.exact[key] != driver_name:
+                logger.warning(f"Fahrer '{driver_name}' ist nicht von '{self.exact[key]}' unterscheidbar, wird nicht indiziert")
+            return
+        self.exact[key] = driver_name
+        folded_key = fold_confusables(key)
+        self.folded.setdefault(folded_key, []).append(driver_name)
+        self.tree.add(folded_key)
+
+    def lookup(self, driver_name: str, min_confidence: float = DRIVER_MATCH_MIN_CONFIDENCE) -> Optional[Tuple[str, float]]:
+        """Liefert (bekannter Fahrername, Konfidenz) oder None"""
+        key = normalize_driver_name(driver_name)
+        if key in self.exact:
+            return self.exact[key], 1.0
+        if not key:
+            return None
+
+        # Verwechslung wie 0/O: nur eindeutig zuordnen
+        key = fold_confusables(key)
+        drivers = self.folded.get(key)
+        if drivers:
+            return (drivers[0], 1.0) if len(drivers) == 1 else None
+        if min_confidence >= 1.0:
+            return None
+
+        # Der Kandidat darf länger sein als der Schlüssel, daher die Obergrenze über die Konfidenz
+        max_distance = int(len(key) * (1 - min_confidence) / max(min_confidence, 0.01) + 1e-9)
+        if max_distance < 1:
+            return None
+        candidates = self.tree.search(key, max_distance)
+        if not candidates:
+            return None
+        # Bei Gleichstand ist die Zuordnung nicht eindeutig
+        if len(candidates) > 1 and candidates[0][0] == candidates[1][0]:
+            return None
+
+        distance, match = candidates[0]
+        confidence = 1 - distance / max(len(key), len(match))
+        if confidence < min_confidence or len(self.folded[match]) > 1:
+            return None
+        return self.folded[match][0], confidence
+
 class ChannelConfig:
     """Konfiguration für einen Channel"""
     def __init__(self, channel_id: int, leaderboard_post_id: int):
@@ -41,20 +438,54 @@ class ChannelConfig:
         self.leaderboard_post_id = leaderboard_post_id
         self.driver_mappings = {}  # fahrername -> discord_username
         self.is_active = True
+        self.ocr_settings = {}  # Abweichungen von DEFAULT_OCR_SETTINGS
+        self.extra_post_ids: List[int] = []  # weitere Posts, auf die das Leaderboard verteilt wird
+        self.leaderboard: Optional[Leaderboard] = None  # None: noch nicht aus dem Post geladen
+        self._driver_index: Optional[DriverIndex] = None
+        self._renderer: Optional['LeaderboardRenderer'] = None
+
+    @property
+    def post_ids(self) -> List[int]:
+        """Alle Leaderboard-Posts in Anzeigereihenfolge"""
+        return [self.leaderboard_post_id] + self.extra_post_ids
+
+    def get_renderer(self) -> 'LeaderboardRenderer':
+        if self._renderer is None:
+            self._renderer = LeaderboardRenderer()
+        return self._renderer
+
+    def get_driver_index(self) -> DriverIndex:
+        if self._driver_index is None:
+            self._driver_index = DriverIndex(self.driver_mappings)
+        return self._driver_index
+
+    def add_driver(self, driver_name: str, discord_user: str):
+        self.driver_mappings[driver_name] = discord_user
+        self.get_driver_index().add(driver_name)
+
+    def get_ocr_settings(self) -> Dict:
+        return {**DEFAULT_OCR_SETTINGS, **self.ocr_settings}
 
     def to_dict(self):
         return {
             'channel_id': self.channel_id,
             'leaderboard_post_id': self.leaderboard_post_id,
+            'extra_post_ids': self.extra_post_ids,
             'driver_mappings': self.driver_mappings,
-            'is_active': self.is_active
+            'is_active': self.is_active,
+            'ocr_settings': self.ocr_settings,
+            'leaderboard': self.leaderboard.to_list() if self.leaderboard is not None else None
         }
 
     @classmethod
     def from_dict(cls, data):
         config = cls(data['channel_id'], data['leaderboard_post_id'])
+        config.extra_post_ids = data.get('extra_post_ids', [])
         config.driver_mappings = data.get('driver_mappings', {})
         config.is_active = data.get('is_active', True)
+        config.ocr_settings = data.get('ocr_settings', {})
+        if data.get('leaderboard') is not None:
+            config.leaderboard = Leaderboard.from_list(data['leaderboard'])
         return config
 
 def load_channel_config(channel_id: int) -> Optional[ChannelConfig]:
@@ -69,25 +500,325 @@ def load_channel_config(channel_id: int) -> Optional[ChannelConfig]:
             logger.error(f"Fehler beim Laden der Konfiguration für Channel {channel_id}: {e}")
     return None
 
-def save_channel_config(config: ChannelConfig):
-    """Speichert die Konfiguration für einen Channel"""
-    config_file = f'channel_{config.channel_id}.json'
+def write_channel_config(data: Dict):
+    """Schreibt eine Channel-Konfiguration atomar (temporäre Datei + Umbenennen)"""
+    config_file = f'channel_{data["channel_id"]}.json'
+    tmp_file = f'{config_file}.tmp'
     try:
-        with open(config_file, 'w', encoding='utf-8') as f:
-            json.dump(config.to_dict(), f, indent=2, ensure_ascii=False)
-        logger.info(f"Konfiguration für Channel {config.channel_id} gespeichert")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, config_file)
+        logger.info(f"Konfiguration für Channel {data['channel_id']} gespeichert")
     except Exception as e:
-        logger.error(f"Fehler beim Speichern der Konfiguration für Channel {config.channel_id}: {e}")
+        logger.error(f"Fehler beim Speichern der Konfiguration für Channel {data['channel_id']}: {e}")
 
-def remove_channel_config(channel_id: int):
-    """Entfernt die Konfiguration für einen Channel"""
-    config_file = f'channel_{channel_id}.json'
-    try:
+def list_json_channel_ids() -> List[int]:
+    """Channel-IDs aller JSON-Konfigurationen im Arbeitsverzeichnis"""
+    channel_ids = []
+    for filename in os.listdir('.'):
+        match = re.fullmatch(r'channel_(\d+)\.json', filename)
+        if match:
+            channel_ids.append(int(match.group(1)))
+    return channel_ids
+
+class JsonStorage:
+    """Bisheriges Format: eine JSON-Datei pro Channel, ohne Ergebnis-Historie"""
+    name = 'json'
+
+    def load_configs(self) -> List[ChannelConfig]:
+        configs = [load_channel_config(channel_id) for channel_id in list_json_channel_ids()]
+        return [config for config in configs if config]
+
+    def write(self, snapshots: List[Dict], results: List[Dict]):
+        for data in snapshots:
+            write_channel_config(data)
+
+    def delete_channel(self, channel_id: int):
+        config_file = f'channel_{channel_id}.json'
         if os.path.exists(config_file):
             os.remove(config_file)
-            logger.info(f"Konfiguration für Channel {channel_id} entfernt")
-    except Exception as e:
-        logger.error(f"Fehler beim Entfernen der Konfiguration für Channel {channel_id}: {e}")
+
+    def close(self):
+        pass
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS channels (
+    channel_id INTEGER PRIMARY KEY,
+    leaderboard_post_id INTEGER NOT NULL,
+    extra_post_ids TEXT NOT NULL DEFAULT '[]',
+    is_active INTEGER NOT NULL DEFAULT 1,
+    ocr_settings TEXT NOT NULL DEFAULT '{}',
+    leaderboard_loaded INTEGER NOT NULL DEFAULT 0,
+    ended_at TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_channels_active ON channels (is_active);
+
+CREATE TABLE IF NOT EXISTS driver_mappings (
+    channel_id INTEGER NOT NULL,
+    driver_name TEXT NOT NULL,
+    discord_user TEXT,
+    PRIMARY KEY (channel_id, driver_name)
+);
+CREATE INDEX IF NOT EXISTS idx_driver_mappings_driver ON driver_mappings (driver_name);
+
+CREATE TABLE IF NOT EXISTS leaderboard_entries (
+    channel_id INTEGER NOT NULL,
+    identifier TEXT NOT NULL,
+    driver_name TEXT NOT NULL,
+    discord_user TEXT,
+    race_time TEXT NOT NULL,
+    time_ms INTEGER NOT NULL,
+    PRIMARY KEY (channel_id, identifier)
+);
+CREATE INDEX IF NOT EXISTS idx_leaderboard_entries_time ON leaderboard_entries (channel_id, time_ms);
+CREATE INDEX IF NOT EXISTS idx_leaderboard_entries_driver ON leaderboard_entries (driver_name);
+
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel_id INTEGER NOT NULL,
+    driver_name TEXT NOT NULL,
+    discord_user TEXT,
+    race_time TEXT NOT NULL,
+    time_ms INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    message_id INTEGER,
+    submitted_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_channel_time ON results (channel_id, time_ms);
+CREATE INDEX IF NOT EXISTS idx_results_driver_time ON results (driver_name, time_ms);
+CREATE INDEX IF NOT EXISTS idx_results_submitted ON results (submitted_at);
+CREATE INDEX IF NOT EXISTS idx_results_message ON results (message_id);
+"""
+
+class SqliteStorage:
+    """Eingebettete SQLite-Datenbank (WAL) für Konfigurationen, Zuordnungen, Leaderboards und alle übernommenen Zeiten"""
+    name = 'sqlite'
+
+    def __init__(self, path: str):
+        self.path = path
+        # Geschrieben wird aus dem Flush-Thread, die Verbindung ist durch den Lock geschützt
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        with self.lock:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            self.connection.executescript(SQLITE_SCHEMA)
+            self.migrate()
+        self.import_json_configs()
+
+    def migrate(self):
+        """Ergänzt Spalten, die in älteren Datenbanken noch fehlen"""
+        columns = {row['name'] for row in self.connection.execute('PRAGMA table_info(channels)')}
+        if 'extra_post_ids' not in columns:
+            with self.connection:
+                self.connection.execute("ALTER TABLE channels ADD COLUMN extra_post_ids TEXT NOT NULL DEFAULT '[]'")
+            logger.info(f"Datenbank {self.path}: Spalte extra_post_ids ergänzt")
+
+    def import_json_configs(self):
+        """Übernimmt vorhandene channel_<id>.json Dateien einmalig in die Datenbank"""
+        channel_ids = list_json_channel_ids()
+        if not channel_ids:
+            return
+        imported = 0
+        for channel_id in channel_ids:
+            config = load_channel_config(channel_id)
+            if config is None:
+                continue
+            with self.lock:
+                exists = self.connection.execute(
+                    'SELECT 1 FROM channels WHERE channel_id = ?', (channel_id,)
+                ).fetchone()
+            if not exists:
+                self.write([config.to_dict()], [])
+                imported += 1
+            # Datei als Sicherung behalten, aber nicht erneut importieren
+            os.replace(f'channel_{channel_id}.json', f'channel_{channel_id}.json.imported')
+        logger.info(f"{imported} JSON-Konfigurationen in {self.path} importiert")
+
+    def load_configs(self) -> List[ChannelConfig]:
+        with self.lock:
+            channel_rows = self.connection.execute('SELECT * FROM channels').fetchall()
+            mapping_rows = self.connection.execute(
+                'SELECT channel_id, driver_name, discord_user FROM driver_mappings'
+            ).fetchall()
+            entry_rows = self.connection.execute(
+                'SELECT channel_id, driver_name, discord_user, race_time FROM leaderboard_entries ORDER BY channel_id, time_ms'
+            ).fetchall()
+
+        configs = {}
+        for row in channel_rows:
+            config = ChannelConfig(row['channel_id'], row['leaderboard_post_id'])
+            config.extra_post_ids = json.loads(row['extra_post_ids'])
+            config.is_active = bool(row['is_active'])
+            config.ocr_settings = json.loads(row['ocr_settings'])
+            if row['leaderboard_loaded']:
+                config.leaderboard = Leaderboard()
+            configs[config.channel_id] = config
+        for row in mapping_rows:
+            if row['channel_id'] in configs:
+                configs[row['channel_id']].driver_mappings[row['driver_name']] = row['discord_user']
+        for row in entry_rows:
+            config = configs.get(row['channel_id'])
+            if config and config.leaderboard is not None:
+                config.leaderboard.submit(row['driver_name'], row['discord_user'], row['race_time'])
+        return list(configs.values())
+
+    def write(self, snapshots: List[Dict], results: List[Dict]):
+        """Schreibt Konfigurationen und neue Ergebnisse in einer Transaktion"""
+        now = datetime.now(GERMAN_TZ).isoformat()
+        with self.lock, self.connection:
+            for data in snapshots:
+                channel_id = data['channel_id']
+                self.connection.execute(
+                    """
+                    INSERT INTO channels (channel_id, leaderboard_post_id, extra_post_ids, is_active, ocr_settings, leaderboard_loaded, ended_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, CASE WHEN ? THEN NULL ELSE ? END, ?)
+                    ON CONFLICT (channel_id) DO UPDATE SET
+                        leaderboard_post_id = excluded.leaderboard_post_id,
+                        extra_post_ids = excluded.extra_post_ids,
+                        is_active = excluded.is_active,
+                        ocr_settings = excluded.ocr_settings,
+                        leaderboard_loaded = excluded.leaderboard_loaded,
+                        ended_at = CASE WHEN excluded.is_active THEN NULL ELSE COALESCE(channels.ended_at, excluded.updated_at) END,
+                        updated_at = excluded.updated_at
+                    """,
+                    (channel_id, data['leaderboard_post_id'], json.dumps(data['extra_post_ids']), int(data['is_active']), json.dumps(data['ocr_settings']),
+                     int(data['leaderboard'] is not None), int(data['is_active']), now, now)
+                )
+                self.connection.execute('DELETE FROM driver_mappings WHERE channel_id = ?', (channel_id,))
+                self.connection.executemany(
+                    'INSERT INTO driver_mappings (channel_id, driver_name, discord_user) VALUES (?, ?, ?)',
+                    [(channel_id, driver_name, discord_user) for driver_name, discord_user in data['driver_mappings'].items()]
+                )
+                self.connection.execute('DELETE FROM leaderboard_entries WHERE channel_id = ?', (channel_id,))
+                self.connection.executemany(
+                    """
+                    INSERT INTO leaderboard_entries (channel_id, identifier, driver_name, discord_user, race_time, time_ms)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    [
+                        (channel_id, Leaderboard.make_identifier(entry['driver_name'], entry['discord_user']),
+                         entry['driver_name'], entry['discord_user'], entry['time'], time_to_milliseconds(entry['time']))
+                        for entry in data['leaderboard'] or []
+                    ]
+                )
+            self.connection.executemany(
+                """
+                INSERT INTO results (channel_id, driver_name, discord_user, race_time, time_ms, status, message_id, submitted_at)
+                VALUES (:channel_id, :driver_name, :discord_user, :race_time, :time_ms, :status, :message_id, :submitted_at)
+                """,
+                results
+            )
+
+    def delete_channel(self, channel_id: int):
+        with self.lock, self.connection:
+            for table in ('channels', 'driver_mappings', 'leaderboard_entries', 'results'):
+                self.connection.execute(f'DELETE FROM {table} WHERE channel_id = ?', (channel_id,))
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+def open_storage():
+    """Öffnet das konfigurierte Speicher-Backend"""
+    global storage
+    if STORAGE_BACKEND == 'json':
+        storage = JsonStorage()
+    else:
+        storage = SqliteStorage(DATABASE_FILE)
+    logger.info(f"Speicher-Backend: {storage.name}")
+
+def load_all_channel_configs():
+    """Lädt beim Start alle Channel-Konfigurationen in den Speicher"""
+    for config in storage.load_configs():
+        channel_configs[config.channel_id] = config
+    logger.info(f"{len(channel_configs)} Channel-Konfigurationen geladen")
+
+def get_channel_config(channel_id: int) -> Optional[ChannelConfig]:
+    """Liefert die Konfiguration eines Channels aus dem Speicher"""
+    return channel_configs.get(channel_id)
+
+def is_current_config(config: ChannelConfig) -> bool:
+    """Prüft, ob config noch die Konfiguration ihres Channels ist (nicht entfernt oder neu hinzugefügt)"""
+    return channel_configs.get(config.channel_id) is config
+
+def save_channel_config(config: ChannelConfig):
+    """Merkt eine Konfiguration zum Speichern vor, geschrieben wird gebündelt im Hintergrund"""
+    current = channel_configs.get(config.channel_id)
+    if config.channel_id in removed_channels or (current is not None and current is not config):
+        # Veraltete Konfiguration eines noch laufenden Jobs, nur !add_challenge legt den Channel wieder an
+        logger.info(f"Konfiguration für Channel {config.channel_id} ist nicht mehr aktuell, wird nicht gespeichert")
+        return
+    channel_configs[config.channel_id] = config
+    dirty_configs.add(config.channel_id)
+
+def submission_time(message_id: Optional[int]) -> datetime:
+    """Erstellungszeitpunkt der Quell-Nachricht (steckt in der Snowflake-ID), ohne Nachricht: jetzt"""
+    if message_id is None:
+        return datetime.now(GERMAN_TZ)
+    return discord.utils.snowflake_time(message_id)
+
+def record_result(channel_id: int, driver_name: str, discord_user: Optional[str], race_time: str,
+                  status: str, message_id: Optional[int], submitted_at: datetime):
+    """Merkt eine übernommene Zeit mit ihrer Quell-Nachricht und dem Zeitpunkt des Posts für die Ergebnis-Historie vor"""
+    pending_results.append({
+        'channel_id': channel_id,
+        'driver_name': driver_name,
+        'discord_user': discord_user,
+        'race_time': race_time,
+        'time_ms': time_to_milliseconds(race_time),
+        'status': status,
+        'message_id': message_id,
+        'submitted_at': submitted_at.astimezone(GERMAN_TZ).isoformat()
+    })
+
+def take_dirty_configs() -> Tuple[List[Dict], List[Dict], List[int]]:
+    """Entnimmt alle vorgemerkten Konfigurationen, Ergebnisse und entfernten Channels als Schnappschuss"""
+    snapshots = [channel_configs[channel_id].to_dict() for channel_id in dirty_configs if channel_id in channel_configs]
+    dirty_configs.clear()
+    results = pending_results[:]
+    pending_results.clear()
+    removed = list(pending_deletes)
+    pending_deletes.clear()
+    return snapshots, results, removed
+
+def write_channel_configs(snapshots: List[Dict], results: List[Dict], removed: List[int]):
+    """Löscht entfernte Channels und schreibt danach Konfigurationen und Ergebnisse"""
+    with flush_lock:
+        # Erst löschen: ein erneut hinzugefügter Channel steckt dann schon in snapshots
+        for channel_id in removed:
+            try:
+                storage.delete_channel(channel_id)
+                logger.info(f"Konfiguration für Channel {channel_id} entfernt")
+            except Exception as e:
+                logger.error(f"Fehler beim Entfernen der Konfiguration für Channel {channel_id}: {e}")
+        # Schnappschüsse von Channels, die inzwischen entfernt wurden, nicht mehr schreiben
+        snapshots = [data for data in snapshots if data['channel_id'] not in removed_channels]
+        results = [result for result in results if result['channel_id'] not in removed_channels]
+        try:
+            storage.write(snapshots, results)
+            if snapshots:
+                logger.info(f"{len(snapshots)} Channel-Konfigurationen und {len(results)} Ergebnisse gespeichert")
+        except Exception as e:
+            logger.error(f"Fehler beim Speichern der Channel-Konfigurationen: {e}")
+
+def flush_channel_configs():
+    """Schreibt alle vorgemerkten Konfigurationen sofort (z.B. beim Herunterfahren)"""
+    write_channel_configs(*take_dirty_configs())
+
+async def remove_channel_config(channel_id: int):
+    """Entfernt die Konfiguration für einen Channel"""
+    channel_configs.pop(channel_id, None)
+    dirty_configs.discard(channel_id)
+    pending_results[:] = [result for result in pending_results if result['channel_id'] != channel_id]
+    # Gelöscht wird im Flush-Thread nach einem eventuell noch laufenden Schreibvorgang
+    removed_channels.add(channel_id)
+    pending_deletes.add(channel_id)
+    await asyncio.to_thread(write_channel_configs, *take_dirty_configs())
 
 def extract_date_from_channel_name(channel_name: str) -> Optional[datetime]:
     """Extrahiert das Datum aus dem Channel-Namen (Format: DD-MM-YY)"""
@@ -106,57 +837,419 @@ def extract_date_from_channel_name(channel_name: str) -> Optional[datetime]:
             logger.error(f"Ungültiges Datumsformat in Channel-Name: {date_str}")
     return None
 
-def is_challenge_active(channel_name: str) -> bool:
-    """Prüft, ob eine Challenge noch aktiv ist"""
-    end_time = extract_date_from_channel_name(channel_name)
-    if end_time:
-        now = datetime.now(GERMAN_TZ)
-        return now < end_time
-    return True  # Falls kein Datum erkannt wird, als aktiv betrachten
+class ChallengeDeadlineScheduler:
+    """Beendet Challenges pünktlich: das Ende jedes Channels wird einmal berechnet und liegt in einem Heap"""
+    MAX_SLEEP_SECONDS = 300  # Wanduhr regelmäßig neu prüfen (Zeitumstellung, Drift)
+    RETRY_SECONDS = 30  # erster Wiederholungsversuch, danach verdoppelt bis MAX_SLEEP_SECONDS
+
+    def __init__(self):
+        self.deadlines: Dict[int, datetime] = {}  # channel_id -> Challenge-Ende
+        self.heap: List[Tuple[float, int]] = []  # (timestamp, channel_id), veraltete Einträge werden übersprungen
+        self.retries: Dict[int, Tuple[float, int]] = {}  # channel_id -> (nächster Versuch, Anzahl Fehlversuche)
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.ending = set()  # laufende end_challenge Tasks
+
+    def set_channel(self, channel_id: int, channel_name: str):
+        """Berechnet das Challenge-Ende aus dem Channel-Namen (bei Hinzufügen oder Umbenennen)"""
+        deadline = extract_date_from_channel_name(channel_name)
+        if deadline is None:
+            self.remove_channel(channel_id)
+            return
+        self.set_deadline(channel_id, deadline)
+
+    def set_deadline(self, channel_id: int, deadline: datetime):
+        if self.deadlines.get(channel_id) == deadline:
+            return
+        self.deadlines[channel_id] = deadline
+        self.retries.pop(channel_id, None)
+        heapq.heappush(self.heap, (deadline.timestamp(), channel_id))
+        self.wakeup.set()
+        logger.info(f"Challenge-Ende für Channel {channel_id}: {deadline.strftime('%d.%m.%y %H:%M')}")
+
+    def remove_channel(self, channel_id: int):
+        self.retries.pop(channel_id, None)
+        if self.deadlines.pop(channel_id, None) is not None:
+            self.wakeup.set()
+
+    def _retry(self, channel_id: int, reason: str):
+        """Plant einen neuen Versuch, die Challenge zu beenden, mit wachsendem Abstand"""
+        if channel_id not in self.deadlines:
+            return
+        attempts = self.retries.get(channel_id, (0.0, 0))[1] + 1
+        delay = min(self.RETRY_SECONDS * 2 ** (attempts - 1), self.MAX_SLEEP_SECONDS)
+        timestamp = datetime.now(GERMAN_TZ).timestamp() + delay
+        self.retries[channel_id] = (timestamp, attempts)
+        heapq.heappush(self.heap, (timestamp, channel_id))
+        self.wakeup.set()
+        logger.warning(f"Challenge in Channel {channel_id} nicht beendet ({reason}), neuer Versuch in {delay}s")
+
+    def get_deadline(self, channel_id: int) -> Optional[datetime]:
+        return self.deadlines.get(channel_id)
+
+    def is_open(self, channel_id: int, submitted_at: Optional[datetime] = None) -> bool:
+        """Prüft, ob eine Challenge eine Zeit annimmt, die zum Zeitpunkt submitted_at (Standard: jetzt) gepostet wurde"""
+        deadline = self.deadlines.get(channel_id)
+        if deadline is None:
+            return True  # Falls kein Datum erkannt wird, als aktiv betrachten
+        return (submitted_at or datetime.now(GERMAN_TZ)) < deadline
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    def _next_deadline(self) -> Optional[Tuple[float, int]]:
+        # Veraltete Einträge (entfernt oder umbenannt) verwerfen
+        while self.heap:
+            timestamp, channel_id = self.heap[0]
+            deadline = self.deadlines.get(channel_id)
+            if deadline is not None and deadline.timestamp() == timestamp:
+                return self.heap[0]
+            if channel_id in self.retries and self.retries[channel_id][0] == timestamp:
+                return self.heap[0]
+            heapq.heappop(self.heap)
+        return None
+
+    async def _run(self):
+        while True:
+            try:
+                self.wakeup.clear()
+                next_deadline = self._next_deadline()
+                if next_deadline is None:
+                    await self.wakeup.wait()
+                    continue
+
+                remaining = next_deadline[0] - datetime.now(GERMAN_TZ).timestamp()
+                if remaining > 0:
+                    try:
+                        await asyncio.wait_for(self.wakeup.wait(), min(remaining, self.MAX_SLEEP_SECONDS))
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                # Deadline bleibt gespeichert, damit is_open() ab jetzt False liefert
+                _, channel_id = heapq.heappop(self.heap)
+                config = get_channel_config(channel_id)
+                if not config or not config.is_active:
+                    self.retries.pop(channel_id, None)
+                    continue
+                channel = bot.get_channel(channel_id)
+                if channel is None:
+                    # Channel-Cache noch nicht bereit oder Shard getrennt
+                    self._retry(channel_id, 'Channel nicht gefunden')
+                    continue
+                # Eigener Task: end_challenge wartet auf ausstehende OCR, andere Channels sollen nicht warten
+                task = asyncio.create_task(self._end(channel, config))
+                self.ending.add(task)
+                task.add_done_callback(self.ending.discard)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Fehler im Challenge-Ende-Scheduler: {e}")
+
+    async def _end(self, channel: discord.TextChannel, config: ChannelConfig):
+        if await end_challenge(channel, config):
+            self.retries.pop(channel.id, None)
+        else:
+            self._retry(channel.id, 'Fehler beim Beenden')
+
+deadline_scheduler = ChallengeDeadlineScheduler()
+
+class OCREngine(abc.ABC):
+    """Schnittstelle für OCR-Engines, erlaubt z.B. eine Fake-Engine in Tests"""
+    name = 'base'
+
+    @abc.abstractmethod
+    def image_to_string(self, image: Image.Image) -> str:
+        ...
+
+    def close(self):
+        pass
+
+class PytesseractEngine(OCREngine):
+    """Fallback: startet pro Bild einen eigenen tesseract-Prozess"""
+    name = 'pytesseract'
+
+    def __init__(self):
+        tesseract_cmd = os.getenv('TESSERACT_CMD')
+        if tesseract_cmd:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+    def image_to_string(self, image: Image.Image) -> str:
+        # OCR Konfiguration für bessere Erkennung
+        custom_config = f'--oem 3 --psm 6 -c tessedit_char_whitelist={OCR_CHAR_WHITELIST}'
+        return pytesseract.image_to_string(image, config=custom_config, lang=OCR_LANG)
+
+class TesserocrEngine(OCREngine):
+    """Hält eine initialisierte Tesseract-API, die Sprachmodelle werden nur einmal geladen"""
+    name = 'tesserocr'
+
+    def __init__(self):
+        kwargs = {}
+        tessdata_path = os.getenv('TESSDATA_PREFIX')
+        if tessdata_path:
+            kwargs['path'] = tessdata_path
+        self.api = tesserocr.PyTessBaseAPI(
+            lang=OCR_LANG,
+            psm=tesserocr.PSM.SINGLE_BLOCK,
+            oem=tesserocr.OEM.DEFAULT,
+            **kwargs
+        )
+        self.api.SetVariable('tessedit_char_whitelist', OCR_CHAR_WHITELIST)
+
+    def image_to_string(self, image: Image.Image) -> str:
+        self.api.SetImage(image)
+        return self.api.GetUTF8Text()
+
+    def close(self):
+        self.api.End()
+
+def create_ocr_engine() -> OCREngine:
+    """Erstellt die konfigurierte OCR-Engine, mit Fallback auf pytesseract"""
+    if OCR_ENGINE in ('auto', 'tesserocr'):
+        if tesserocr is not None:
+            try:
+                return TesserocrEngine()
+            except Exception as e:
+                logger.warning(f"tesserocr konnte nicht initialisiert werden, verwende pytesseract: {e}")
+        elif OCR_ENGINE == 'tesserocr':
+            logger.warning("tesserocr ist nicht installiert, verwende pytesseract")
+    return PytesseractEngine()
+
+def init_ocr_engine(engine_factory: Callable[[], OCREngine] = create_ocr_engine):
+    """Initialisiert die OCR-Engine des aktuellen Prozesses (einmal pro Worker)"""
+    global ocr_engine
+    if ocr_engine is not None:
+        ocr_engine.close()
+    ocr_engine = engine_factory()
+    logger.info(f"OCR-Engine {ocr_engine.name} initialisiert (PID {os.getpid()})")
+
+def get_ocr_engine() -> OCREngine:
+    """Gibt die OCR-Engine des aktuellen Prozesses zurück"""
+    if ocr_engine is None:
+        init_ocr_engine()
+    return ocr_engine
+
+def ocr_engine_name() -> str:
+    """Liefert den Namen der Engine, dient auch zum Vorwärmen der Worker"""
+    return get_ocr_engine().name
+
+def open_image(image_data: bytes) -> Image.Image:
+    """Dekodiert ein Bild direkt aus dem Speicher und prüft die Pixelanzahl vor dem Dekodieren"""
+    if len(image_data) > MAX_ATTACHMENT_BYTES:
+        raise ValueError(f"Bild zu groß: {len(image_data)} Bytes")
+
+    # Image.open liest nur den Header, die Pixeldaten werden erst bei load() dekodiert
+    image = Image.open(BytesIO(image_data))
+    if image.width * image.height > MAX_IMAGE_PIXELS:
+        raise ValueError(f"Bild hat zu viele Pixel: {image.width}x{image.height}")
+    image.load()
+    return image
+
+def otsu_threshold(image: Image.Image) -> int:
+    """Berechnet den Otsu-Schwellwert eines Graustufenbildes aus dem Histogramm"""
+    histogram = image.histogram()
+    total = sum(histogram)
+    sum_all = sum(i * count for i, count in enumerate(histogram))
+
+    sum_background = 0
+    weight_background = 0
+    best_threshold = 127
+    best_variance = 0.0
+    for i, count in enumerate(histogram):
+        weight_background += count
+        if weight_background == 0:
+            continue
+        weight_foreground = total - weight_background
+        if weight_foreground == 0:
+            break
+        sum_background += i * count
+        mean_background = sum_background / weight_background
+        mean_foreground = (sum_all - sum_background) / weight_foreground
+        variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_variance = variance
+            best_threshold = i
+    return best_threshold
+
+def binarize(image: Image.Image, threshold: int) -> Image.Image:
+    """Schwarz/Weiß-Bild: Text schwarz, Hintergrund weiß"""
+    return image.point(lambda p: 255 if p > threshold else 0)
+
+def find_text_rows(binary: Image.Image) -> List[Tuple[int, int]]:
+    """Findet zusammenhängende Pixelzeilen mit Text als (start, ende)"""
+    # Auf 1 Pixel Breite reduzieren: jede Zeile mit dunklen Pixeln enthält Text
+    profile = list(binary.resize((1, binary.height), Image.BOX).getdata())
+    rows = []
+    start = None
+    for y, value in enumerate(profile):
+        if value < 250:
+            if start is None:
+                start = y
+        elif start is not None:
+            rows.append((start, y))
+            start = None
+    if start is not None:
+        rows.append((start, len(profile)))
+    # Linien und Rauschen ignorieren
+    return [(top, bottom) for top, bottom in rows if bottom - top >= 4]
+
+def estimate_text_height(rows: List[Tuple[int, int]]) -> Optional[int]:
+    """Schätzt die typische Zeilenhöhe als Median der Textzeilen"""
+    if not rows:
+        return None
+    heights = sorted(bottom - top for top, bottom in rows)
+    return heights[len(heights) // 2]
+
+def detect_results_region(rows: List[Tuple[int, int]], text_height: int) -> Optional[Tuple[int, int]]:
+    """Findet den vertikalen Bereich der Ergebnistabelle (größter Block dicht aufeinanderfolgender Textzeilen)"""
+    if not rows:
+        return None
+    max_gap = text_height * 2
+    blocks = [[rows[0]]]
+    for row in rows[1:]:
+        if row[0] - blocks[-1][-1][1] <= max_gap:
+            blocks[-1].append(row)
+        else:
+            blocks.append([row])
+    block = max(blocks, key=len)
+    return block[0][0], block[-1][1]
+
+def validate_ocr_setting(key: str, value):
+    """Prüft einen Wert für !ocr_settings, liefert ihn normalisiert oder wirft ValueError mit Begründung"""
+    if key in ('preprocess', 'debug'):
+        if not isinstance(value, bool):
+            raise ValueError("erwartet `true` oder `false`")
+        return value
+    if key == 'threshold':
+        if value == 'otsu':
+            return value
+        if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= 255:
+            raise ValueError("erwartet `\"otsu\"` oder eine ganze Zahl von 0 bis 255")
+        return value
+    if key == 'target_text_height':
+        if value is None:
+            return value
+        if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+            raise ValueError("erwartet eine positive ganze Zahl oder `null`")
+        return value
+    if key == 'crop':
+        if value is None or value == 'auto':
+            return value
+        if (not isinstance(value, list) or len(value) != 4
+                or any(isinstance(part, bool) or not isinstance(part, (int, float)) for part in value)):
+            raise ValueError("erwartet `null`, `\"auto\"` oder `[links, oben, rechts, unten]` als Anteile 0..1")
+        left, top, right, bottom = value
+        if not (0 <= left < right <= 1 and 0 <= top < bottom <= 1):
+            raise ValueError("Anteile müssen zwischen 0 und 1 liegen, links < rechts und oben < unten")
+        return value
+    raise ValueError("unbekannte Einstellung")
+
+def preprocess_image(image: Image.Image, settings: Dict, debug_id: Optional[str] = None) -> Image.Image:
+    """Bereitet einen Screenshot für die OCR vor: Zuschnitt, Graustufen, Binarisierung, Verkleinerung"""
+    def dump(stage: str, stage_image: Image.Image):
+        if debug_id:
+            os.makedirs(OCR_DEBUG_DIR, exist_ok=True)
+            stage_image.save(os.path.join(OCR_DEBUG_DIR, f"{debug_id}_{stage}.png"))
+
+    # Fester Zuschnitt (Anteile der Bildgröße)
+    crop = settings.get('crop')
+    if isinstance(crop, (list, tuple)) and len(crop) == 4:
+        left, top, right, bottom = crop
+        image = image.crop((
+            int(left * image.width), int(top * image.height),
+            int(right * image.width), int(bottom * image.height)
+        ))
+
+    gray = image.convert('L')
+    # Dunkles App-Design: invertieren, damit der Text dunkel auf hellem Grund steht
+    if ImageStat.Stat(gray).mean[0] < 128:
+        gray = ImageOps.invert(gray)
+    dump('gray', gray)
+
+    threshold = settings.get('threshold', 'otsu')
+    if threshold == 'otsu':
+        threshold = otsu_threshold(gray)
+    binary = binarize(gray, int(threshold))
+
+    rows = find_text_rows(binary)
+    text_height = estimate_text_height(rows)
+
+    # Automatischer Zuschnitt auf die Ergebnistabelle
+    if crop == 'auto' and text_height:
+        region = detect_results_region(rows, text_height)
+        if region:
+            margin = text_height
+            top = max(region[0] - margin, 0)
+            bottom = min(region[1] + margin, gray.height)
+            gray = gray.crop((0, top, gray.width, bottom))
+            dump('crop', gray)
+
+    # Verkleinern auf die Ziel-Texthöhe (nur verkleinern, nie vergrößern)
+    target_height = settings.get('target_text_height')
+    if target_height and text_height and text_height > target_height:
+        scale = target_height / text_height
+        gray = gray.resize(
+            (max(int(gray.width * scale), 1), max(int(gray.height * scale), 1)),
+            Image.LANCZOS
+        )
 
-def extract_race_results(image_path: str) -> List[Tuple[str, str]]:
-    """Extrahiert Rennergebnisse aus einem Screenshot"""
+    result = binarize(gray, int(threshold))
+    dump('binary', result)
+    return result
+
+class OCRError(Exception):
+    """Texterkennung eines Bildes fehlgeschlagen, im Gegensatz zu einem leeren Ergebnis wird das nicht gecacht"""
+
+def extract_race_results(image_data: bytes, settings: Optional[Dict] = None) -> List[Tuple[str, str]]:
+    """Extrahiert Rennergebnisse aus einem Screenshot, Fehler werden als OCRError gemeldet"""
     try:
-        image = Image.open(image_path)
+        image = open_image(image_data)
+        settings = {**DEFAULT_OCR_SETTINGS, **(settings or {})}
         
-        # OCR Konfiguration für bessere Erkennung
-        custom_config = r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyzÄÖÜäöüß:.| '
+        if settings['preprocess']:
+            debug_id = hashlib.sha1(image_data).hexdigest()[:12] if settings['debug'] else None
+            image = preprocess_image(image, settings, debug_id)
         
         # Text extrahieren
-        text = pytesseract.image_to_string(image, config=custom_config, lang='deu+eng')
+        text = get_ocr_engine().image_to_string(image)
         logger.info(f"OCR Ergebnis: {text}")
         
-        results = []
-        lines = text.strip().split('\n')
-        
-        for line in lines:
-            # Suche nach Zeit-Pattern (MM:SS.mmm)
-            time_pattern = r'(\d{1,2}:\d{2}\.\d{3})'
-            time_match = re.search(time_pattern, line)
-            
-            if time_match:
-                race_time = time_match.group(1)
-                
-                # Suche nach Fahrername (vor der Zeit)
-                parts = line.split()
-                driver_name = None
-                
-                for i, part in enumerate(parts):
-                    if time_pattern in part:
-                        # Fahrername sollte vor der Zeit stehen
-                        if i > 0:
-                            driver_name = ' '.join(parts[:i]).strip()
-                        break
-                
-                if driver_name and validate_time_format(race_time):
-                    results.append((driver_name, race_time))
-                    logger.info(f"Extrahiert: {driver_name} - {race_time}")
-        
-        return results
+        return parse_race_results(text)
     
     except Exception as e:
         logger.error(f"Fehler bei der OCR-Verarbeitung: {e}")
-        return []
+        raise OCRError(str(e)) from e
+
+def parse_race_results(text: str) -> List[Tuple[str, str]]:
+    """Extrahiert Fahrername und Zeit aus dem OCR-Text"""
+    results = []
+    lines = text.strip().split('\n')
+    
+    for line in lines:
+        # Suche nach Zeit-Pattern (MM:SS.mmm)
+        time_pattern = r'(\d{1,2}:\d{2}\.\d{3})'
+        time_match = re.search(time_pattern, line)
+        
+        if time_match:
+            race_time = time_match.group(1)
+            
+            # Suche nach Fahrername (vor der Zeit)
+            parts = line.split()
+            driver_name = None
+            
+            for i, part in enumerate(parts):
+                if re.search(time_pattern, part):
+                    # Fahrername sollte vor der Zeit stehen
+                    if i > 0:
+                        driver_name = ' '.join(parts[:i]).strip(' |')
+                    break
+            
+            if driver_name and validate_time_format(race_time):
+                results.append((driver_name, race_time))
+                logger.info(f"Extrahiert: {driver_name} - {race_time}")
+    
+    return results
 
 def validate_time_format(time_str: str) -> bool:
     """Validiert das Zeitformat MM:SS.mmm"""
@@ -177,71 +1270,774 @@ def time_to_milliseconds(time_str: str) -> int:
     except:
         return float('inf')
 
-async def update_leaderboard(channel: discord.TextChannel, config: ChannelConfig, new_results: List[Tuple[str, str, str]]):
-    """Aktualisiert das Leaderboard mit neuen Ergebnissen"""
+class OCRJobScheduler:
+    """Begrenzte OCR-Warteschlange: Channels mit dem nächsten Challenge-Ende zuerst, bei gleichem Ende im Wechsel"""
+    def __init__(self, max_size: int, channel_quota: int):
+        self.max_size = max_size
+        self.channel_quota = channel_quota  # Maximal wartende Nachrichten pro Channel
+        self.queues: Dict[int, deque] = {}  # channel_id -> wartende (message, config)
+        self.heap: List[Tuple[float, int, int]] = []  # (Challenge-Ende, Reihenfolge, channel_id), ein Eintrag pro Channel mit Jobs
+        self.sequence = 0
+        self.size = 0
+        self.in_progress: Dict[int, int] = {}  # channel_id -> laufende Jobs
+        self.waiting: Dict[int, int] = {}  # channel_id -> Nachrichten, die in put() auf einen Platz warten
+        self.background: deque = deque()  # Jobs mit niedriger Priorität (Backfill), nur wenn keine Nachricht wartet
+        # Reihenfolge pro Channel: Updates laufen in der Reihenfolge der Nachrichten, auch wenn die OCR anders fertig wird
+        self.tickets: Dict[int, int] = {}  # channel_id -> nächste zu vergebende Nummer
+        self.turns: Dict[int, int] = {}  # channel_id -> Nummer, die als nächste aktualisieren darf
+        self.finished: Dict[int, set] = {}  # channel_id -> vorzeitig abgeschlossene Nummern
+        self.condition = asyncio.Condition()
+
+    def qsize(self) -> int:
+        return self.size + len(self.background)
+
+    def _schedule_channel(self, channel_id: int):
+        # Neue Reihenfolgenummer: bei gleichem Challenge-Ende kommen erst die anderen Channels dran
+        deadline = deadline_scheduler.get_deadline(channel_id)
+        self.sequence += 1
+        heapq.heappush(self.heap, (deadline.timestamp() if deadline else float('inf'), self.sequence, channel_id))
+
+    async def put(self, message, config: ChannelConfig):
+        """Reiht eine Nachricht ein, wartet bei voller Queue oder ausgeschöpftem Channel-Kontingent"""
+        channel_id = message.channel.id
+        async with self.condition:
+            # Schon vor der Aufnahme mitzählen, damit drain() auch auf wartende Nachrichten wartet
+            self.waiting[channel_id] = self.waiting.get(channel_id, 0) + 1
+            try:
+                await self.condition.wait_for(
+                    lambda: self.size < self.max_size and len(self.queues.get(channel_id, ())) < self.channel_quota
+                )
+            finally:
+                self.waiting[channel_id] -= 1
+                if not self.waiting[channel_id]:
+                    del self.waiting[channel_id]
+                    self.condition.notify_all()
+            ticket = self.tickets.get(channel_id, 0)
+            self.tickets[channel_id] = ticket + 1
+            channel_queue = self.queues.setdefault(channel_id, deque())
+            channel_queue.append((message, config, ticket))
+            self.size += 1
+            if len(channel_queue) == 1:
+                self._schedule_channel(channel_id)
+            self.condition.notify_all()
+
+    async def run_background(self, job: Callable[[], Awaitable]):
+        """Führt job mit niedriger Priorität auf einem OCR-Worker aus und liefert dessen Ergebnis"""
+        future = asyncio.get_running_loop().create_future()
+
+        async def run():
+            try:
+                result = await job()
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+
+        async with self.condition:
+            self.background.append(run)
+            self.condition.notify_all()
+        return await future
+
+    async def get(self):
+        """Liefert den nächsten Job des Channels mit dem nächsten Challenge-Ende, sonst einen Hintergrund-Job"""
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.heap or self.background)
+            if not self.heap:
+                return self.background.popleft()
+            _, _, channel_id = heapq.heappop(self.heap)
+            channel_queue = self.queues[channel_id]
+            job = channel_queue.popleft()
+            if channel_queue:
+                self._schedule_channel(channel_id)
+            else:
+                del self.queues[channel_id]
+            self.size -= 1
+            self.in_progress[channel_id] = self.in_progress.get(channel_id, 0) + 1
+            self.condition.notify_all()
+            return job
+
+    async def task_done(self, channel_id: int):
+        async with self.condition:
+            self.in_progress[channel_id] -= 1
+            if not self.in_progress[channel_id]:
+                del self.in_progress[channel_id]
+            self.condition.notify_all()
+
+    async def wait_turn(self, channel_id: int, ticket: int):
+        """Wartet, bis alle früheren Nachrichten des Channels ihr Update abgeschlossen haben"""
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.turns.get(channel_id, 0) == ticket)
+
+    async def finish_turn(self, channel_id: int, ticket: int):
+        """Gibt die Reihenfolge für die nächste Nachricht frei (mehrfacher Aufruf ist unschädlich)"""
+        async with self.condition:
+            turn = self.turns.get(channel_id, 0)
+            if ticket < turn:
+                return
+            finished = self.finished.setdefault(channel_id, set())
+            finished.add(ticket)
+            while turn in finished:
+                finished.remove(turn)
+                turn += 1
+            self.turns[channel_id] = turn
+            if not finished:
+                del self.finished[channel_id]
+            self.condition.notify_all()
+
+    def _channel_idle(self, channel_id: int) -> bool:
+        return channel_id not in self.queues and channel_id not in self.in_progress and channel_id not in self.waiting
+
+    async def drain(self, channel_id: int, timeout: float) -> bool:
+        """Wartet, bis alle Jobs eines Channels verarbeitet sind (auch noch nicht aufgenommene), liefert False bei Timeout"""
+        async with self.condition:
+            try:
+                await asyncio.wait_for(self.condition.wait_for(lambda: self._channel_idle(channel_id)), timeout)
+                return True
+            except asyncio.TimeoutError:
+                return False
+
+    async def join(self):
+        """Wartet, bis alle Jobs verarbeitet sind"""
+        async with self.condition:
+            await self.condition.wait_for(lambda: not self.size and not self.in_progress and not self.waiting)
+
+def start_ocr_workers(engine_factory: Callable[[], OCREngine] = create_ocr_engine):
+    """Startet den Prozess-Pool für OCR und die Worker, die die Job-Queue abarbeiten"""
+    global ocr_executor, ocr_scheduler
+    if ocr_executor is not None:
+        return
+
+    if OCR_WORKER_LISTEN:
+        # OCR läuft in separaten Worker-Prozessen, auch auf anderen Maschinen
+        if not OCR_WORKER_AUTHKEY:
+            raise RuntimeError("OCR_WORKER_AUTHKEY muss gesetzt sein, wenn OCR_WORKER_LISTEN verwendet wird")
+        ocr_executor = RemoteOCRExecutor(OCR_WORKER_LISTEN, OCR_WORKER_AUTHKEY.encode())
+    else:
+        # Jeder Prozess initialisiert seine Engine genau einmal beim Start
+        ocr_executor = ProcessPoolExecutor(
+            max_workers=OCR_WORKERS,
+            initializer=init_ocr_engine,
+            initargs=(engine_factory,)
+        )
+        # Prozesse vorwärmen, damit das erste Bild nicht die Modell-Ladezeit zahlt
+        for _ in range(OCR_WORKERS):
+            ocr_executor.submit(ocr_engine_name)
+    ocr_scheduler = OCRJobScheduler(OCR_QUEUE_SIZE, OCR_CHANNEL_QUOTA)
+    for worker_id in range(OCR_WORKERS):
+        ocr_worker_tasks.append(asyncio.create_task(ocr_worker(worker_id)))
+    logger.info(f"OCR Worker-Pool gestartet ({OCR_WORKERS} {'parallele Jobs' if OCR_WORKER_LISTEN else 'Prozesse'}, "
+                f"Queue-Größe {OCR_QUEUE_SIZE}, {OCR_CHANNEL_QUOTA} pro Channel)")
+
+def stop_ocr_workers():
+    """Stoppt die OCR Worker und den Prozess-Pool"""
+    global ocr_executor
+    for task in ocr_worker_tasks:
+        task.cancel()
+    ocr_worker_tasks.clear()
+
+    if ocr_executor is not None:
+        ocr_executor.shutdown(wait=False, cancel_futures=True)
+        ocr_executor = None
+        logger.info("OCR Worker-Pool gestoppt")
+
+def parse_worker_address(value: str):
+    """'host:port' für TCP, sonst Pfad eines Unix-Sockets"""
+    host, separator, port = value.rpartition(':')
+    if separator and port.isdigit() and not value.startswith('/'):
+        return (host, int(port))
+    return value
+
+class RemoteOCRExecutor(Executor):
+    """Executor, der Jobs an OCR-Worker-Prozesse (python main.py worker) über einen Socket verteilt
+
+    Jede Worker-Verbindung wird von einem eigenen Thread bedient, der jeweils einen Job sendet und
+    auf das Ergebnis wartet. Bricht eine Verbindung ab, geht der laufende Job an den nächsten Worker,
+    nach OCR_JOB_MAX_ATTEMPTS Abbrüchen schlägt er mit OCRError fehl (z.B. ein Bild, das Worker abstürzen lässt).
+    Antwortet ein Worker nicht innerhalb von job_timeout, schlägt der Job mit TimeoutError fehl und
+    die Verbindung wird getrennt, damit der hängende Worker keine weiteren Jobs bekommt.
+    """
+    def __init__(self, address: str, authkey: bytes, job_timeout: float = OCR_JOB_TIMEOUT):
+        self.job_timeout = job_timeout
+        self.address = parse_worker_address(address)
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)  # Verwaister Socket eines früheren Laufs
+        self.listener = Listener(self.address, authkey=authkey)
+        self.jobs: queue.Queue = queue.Queue()
+        self.connections = 0
+        self.connections_lock = threading.Lock()
+        self.closed = False
+        threading.Thread(target=self._accept, name='ocr-remote-accept', daemon=True).start()
+        logger.info(f"Warte auf OCR-Worker unter {address}")
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        if self.closed:
+            raise RuntimeError('RemoteOCRExecutor ist beendet')
+        future = Future()
+        self.jobs.put((future, fn, args, kwargs, 1))
+        return future
+
+    def _accept(self):
+        while not self.closed:
+            try:
+                connection = self.listener.accept()
+            except AuthenticationError:
+                logger.warning("OCR-Worker mit falschem Schlüssel abgewiesen")
+                continue
+            except OSError:
+                break  # Listener geschlossen
+            threading.Thread(target=self._serve, args=(connection,), name='ocr-remote-connection', daemon=True).start()
+
+    def _serve(self, connection):
+        with self.connections_lock:
+            self.connections += 1
+        logger.info(f"OCR-Worker verbunden ({self.connections} aktiv)")
+        try:
+            while True:
+                item = self.jobs.get()
+                if item is None:
+                    self.jobs.put(None)  # Weitere Verbindungs-Threads ebenfalls beenden
+                    return
+                future, fn, args, kwargs, attempt = item
+                # Nach einem Verbindungsabbruch läuft der Job bereits und wird nur neu gesendet
+                if not future.running() and not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    connection.send((fn, args, kwargs))
+                    if not connection.poll(self.job_timeout):
+                        # Nicht erneut verteilen: ein Bild, das einen Worker aufhängt, würde sonst alle blockieren
+                        logger.warning(f"OCR-Worker hat nach {self.job_timeout:g}s nicht geantwortet, Job abgebrochen und Verbindung getrennt")
+                        future.set_exception(TimeoutError(f"OCR-Job nach {self.job_timeout:g}s abgebrochen"))
+                        return
+                    status, value = connection.recv()
+                except (EOFError, OSError):
+                    if attempt >= OCR_JOB_MAX_ATTEMPTS:
+                        logger.warning(f"Verbindung zu einem OCR-Worker verloren, Job nach {attempt} Versuchen abgebrochen")
+                        future.set_exception(OCRError(f"OCR-Job hat {attempt} Worker-Verbindungen abgebrochen"))
+                    else:
+                        logger.warning(f"Verbindung zu einem OCR-Worker verloren, Job wird neu verteilt (Versuch {attempt + 1}/{OCR_JOB_MAX_ATTEMPTS})")
+                        self.jobs.put((future, fn, args, kwargs, attempt + 1))
+                    return
+                except Exception as e:
+                    future.set_exception(e)
+                    continue
+                if status == 'ok':
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+        finally:
+            with self.connections_lock:
+                self.connections -= 1
+            connection.close()
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        self.closed = True
+        self.listener.close()
+        if cancel_futures:
+            while True:
+                try:
+                    item = self.jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[0].cancel()
+        self.jobs.put(None)
+
+def run_remote_worker(address: str, authkey: bytes, engine_factory: Callable[[], OCREngine] = create_ocr_engine):
+    """OCR-Worker-Prozess: verbindet sich mit dem Bot und führt Jobs aus, bis er beendet wird"""
+    init_ocr_engine(engine_factory)
+    target = parse_worker_address(address)
+    while True:
+        try:
+            connection = Client(target, authkey=authkey)
+        except (OSError, AuthenticationError) as e:
+            logger.warning(f"Bot unter {address} nicht erreichbar ({e}), neuer Versuch in {OCR_WORKER_RETRY_SECONDS:.0f}s")
+            sleep(OCR_WORKER_RETRY_SECONDS)
+            continue
+
+        logger.info(f"Mit Bot unter {address} verbunden (PID {os.getpid()})")
+        try:
+            while True:
+                fn, args, kwargs = connection.recv()
+                try:
+                    result = ('ok', fn(*args, **kwargs))
+                except Exception as e:
+                    result = ('error', e)
+                connection.send(result)
+        except (EOFError, OSError):
+            logger.warning("Verbindung zum Bot verloren, verbinde neu")
+        finally:
+            connection.close()
+
+def run_worker_fleet():
+    """python main.py worker: startet OCR_WORKERS Worker-Prozesse, die sich mit OCR_WORKER_ADDRESS verbinden"""
+    if not OCR_WORKER_ADDRESS or not OCR_WORKER_AUTHKEY:
+        logger.error("OCR_WORKER_ADDRESS und OCR_WORKER_AUTHKEY müssen für den Worker-Modus gesetzt sein!")
+        exit(1)
+
+    processes = [
+        multiprocessing.Process(
+            target=run_remote_worker,
+            args=(OCR_WORKER_ADDRESS, OCR_WORKER_AUTHKEY.encode()),
+            name=f'ocr-worker-{worker_id}'
+        )
+        for worker_id in range(OCR_WORKERS)
+    ]
+    for process in processes:
+        process.start()
+    logger.info(f"{len(processes)} OCR-Worker gestartet, Bot unter {OCR_WORKER_ADDRESS}")
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+async def ocr_worker(worker_id: int):
+    """Arbeitet Nachrichten aus der OCR-Queue ab"""
+    while True:
+        job = await ocr_scheduler.get()
+        if callable(job):
+            # Hintergrund-Job, Fehler landen beim Aufrufer
+            await job()
+            continue
+        message, config, ticket = job
+        try:
+            await process_images(message, config, ticket)
+        except Exception as e:
+            logger.error(f"Fehler in OCR Worker {worker_id}: {e}")
+        finally:
+            # Auch ohne Update freigeben, sonst warten spätere Nachrichten des Channels
+            await ocr_scheduler.finish_turn(message.channel.id, ticket)
+            await ocr_scheduler.task_done(message.channel.id)
+
+def timed_extract_race_results(image_data: bytes, settings: Optional[Dict] = None) -> Tuple[List[Tuple[str, str]], float]:
+    """Wie extract_race_results, misst zusätzlich die reine Rechenzeit im Worker"""
+    start = perf_counter()
+    results = extract_race_results(image_data, settings)
+    return results, perf_counter() - start
+
+async def run_ocr(image_data: bytes, settings: Optional[Dict] = None) -> List[Tuple[str, str]]:
+    """Führt die OCR im Prozess-Pool aus, ohne den Event-Loop zu blockieren"""
+    loop = asyncio.get_running_loop()
+    start = perf_counter()
+    results, work_time = await loop.run_in_executor(ocr_executor, timed_extract_race_results, image_data, settings)
+    # 'ocr' ist die Rechenzeit im Worker, 'ocr_wait' die Wartezeit auf einen freien Worker inkl. Übertragung
+    metrics.observe('ocr', work_time)
+    metrics.observe('ocr_wait', max(perf_counter() - start - work_time, 0.0))
+    return results
+
+def ocr_settings_key(settings: Optional[Dict]) -> str:
+    """Kurzer Schlüssel der wirksamen OCR-Einstellungen, Teil des Cache-Schlüssels"""
+    effective = {key: value for key, value in {**DEFAULT_OCR_SETTINGS, **(settings or {})}.items() if key != 'debug'}
+    return hashlib.sha1(json.dumps(effective, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+def image_fingerprint(image_data: bytes) -> Tuple[int, bytes]:
+    """Berechnet dHash und Vorschaubild eines Bildes für den OCR-Cache"""
+    image = Image.open(BytesIO(image_data))
+    if image.width * image.height > MAX_IMAGE_PIXELS:
+        raise ValueError(f"Bild hat zu viele Pixel: {image.width}x{image.height}")
+    # Bei JPEGs nur in reduzierter Auflösung dekodieren
+    image.draft('L', (OCR_CACHE_THUMBNAIL_WIDTH * 2, OCR_CACHE_THUMBNAIL_WIDTH * 4))
+    gray = image.convert('L')
+
+    # dHash: Helligkeitsvergleich benachbarter Pixel auf einem 9x8 Raster
+    pixels = gray.resize((9, 8), Image.LANCZOS).tobytes()
+    dhash = 0
+    for y in range(8):
+        for x in range(8):
+            dhash = (dhash << 1) | (pixels[y * 9 + x] > pixels[y * 9 + x + 1])
+
+    # Der dHash allein unterscheidet Screenshots mit nur einer anderen Ziffer nicht,
+    # deshalb wird ein Vorschaubild zur Verifikation mitgespeichert
+    height = max(int(gray.height * OCR_CACHE_THUMBNAIL_WIDTH / gray.width), 1)
+    thumbnail = gray.resize((OCR_CACHE_THUMBNAIL_WIDTH, height), Image.BOX)
+    buffer = BytesIO()
+    thumbnail.save(buffer, format='PNG')
+    return dhash, buffer.getvalue()
+
+def thumbnail_difference(thumbnail_a: bytes, thumbnail_b: bytes) -> int:
+    """Größte mittlere Helligkeitsabweichung zweier Vorschaubilder in 4x4-Blöcken"""
+    image_a = Image.open(BytesIO(thumbnail_a))
+    image_b = Image.open(BytesIO(thumbnail_b))
+    if abs(image_a.height - image_b.height) > image_a.height * 0.02:
+        return 255  # Anderes Seitenverhältnis
+    image_b = image_b.resize(image_a.size, Image.BOX)
+    difference = ImageChops.difference(image_a, image_b)
+    # Kompressionsartefakte verteilen sich, geänderte Ziffern ergeben lokale Ausreißer
+    blocks = difference.resize((max(image_a.width // 4, 1), max(image_a.height // 4, 1)), Image.BOX)
+    return max(blocks.getdata())
+
+def find_matching_thumbnail(thumbnail: bytes, candidates: List[Tuple[str, bytes]]) -> Optional[str]:
+    """Liefert den ersten Kandidaten, dessen Vorschaubild dem Bild entspricht"""
+    for digest, candidate in candidates:
+        if thumbnail_difference(thumbnail, candidate) <= OCR_CACHE_MAX_PIXEL_DIFF:
+            return digest
+    return None
+
+class OCRResultCache:
+    """LRU-Cache für OCR-Ergebnisse, adressiert über exakten Hash und dHash"""
+    def __init__(self, max_entries: int, max_distance: int, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.path = path
+        self.entries: OrderedDict = OrderedDict()  # sha256:Einstellungen -> {'dhash', 'thumbnail', 'results', 'settings'}
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.dirty = False
+
+    def get_exact(self, digest: str) -> Optional[List[Tuple[str, str]]]:
+        entry = self.entries.get(digest)
+        if entry is None:
+            return None
+        self.entries.move_to_end(digest)
+        self.exact_hits += 1
+        return entry['results']
+
+    def find_candidates(self, dhash: int, settings_key: str) -> List[Tuple[str, bytes]]:
+        """Einträge mit ähnlichem dHash und gleichen OCR-Einstellungen, nach Hamming-Distanz sortiert"""
+        candidates = []
+        for digest, entry in self.entries.items():
+            if entry['settings'] != settings_key:
+                continue
+            distance = (entry['dhash'] ^ dhash).bit_count()
+            if distance <= self.max_distance:
+                candidates.append((distance, digest, entry['thumbnail']))
+        candidates.sort(key=lambda candidate: candidate[0])
+        return [(digest, thumbnail) for _, digest, thumbnail in candidates]
+
+    def get_similar(self, digest: str) -> Optional[List[Tuple[str, str]]]:
+        entry = self.entries.get(digest)
+        if entry is None:
+            return None
+        self.entries.move_to_end(digest)
+        self.similar_hits += 1
+        return entry['results']
+
+    def put(self, digest: str, dhash: int, thumbnail: bytes, results: List[Tuple[str, str]], settings_key: str):
+        self.entries[digest] = {'dhash': dhash, 'thumbnail': thumbnail, 'results': results, 'settings': settings_key}
+        self.entries.move_to_end(digest)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self.dirty = True
+
+    def stats(self) -> Dict:
+        return {
+            'entries': len(self.entries),
+            'exact_hits': self.exact_hits,
+            'similar_hits': self.similar_hits,
+            'misses': self.misses
+        }
+
+    def load(self):
+        """Lädt den Cache aus der Persistenz-Datei"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for digest, entry in data.items():
+                self.entries[digest] = {
+                    'dhash': int(entry['dhash'], 16),
+                    'thumbnail': base64.b64decode(entry['thumbnail']),
+                    'results': [tuple(result) for result in entry['results']],
+                    'settings': entry.get('settings', '')  # ältere Einträge ohne Einstellungen treffen nicht mehr
+                }
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            logger.info(f"OCR-Cache mit {len(self.entries)} Einträgen geladen")
+        except Exception as e:
+            logger.error(f"Fehler beim Laden des OCR-Cache: {e}")
+
+    def save(self):
+        """Speichert den Cache atomar in die Persistenz-Datei"""
+        if not self.path or not self.dirty:
+            return
+        data = {
+            digest: {
+                'dhash': format(entry['dhash'], 'x'),
+                'thumbnail': base64.b64encode(entry['thumbnail']).decode('ascii'),
+                'results': entry['results'],
+                'settings': entry['settings']
+            }
+            for digest, entry in list(self.entries.items())
+        }
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except Exception as e:
+            logger.error(f"Fehler beim Speichern des OCR-Cache: {e}")
+
+ocr_cache = OCRResultCache(OCR_CACHE_SIZE, OCR_CACHE_MAX_DISTANCE, OCR_CACHE_FILE)
+
+async def recognize_image(image_data: bytes, settings: Optional[Dict] = None) -> Tuple[List[Tuple[str, str]], bool]:
+    """Liefert die Rennergebnisse eines Bildes und ob sie aus dem Cache stammen"""
+    # Ergebnisse hängen von den OCR-Einstellungen ab, nach !ocr_settings wird neu erkannt
+    settings_key = ocr_settings_key(settings)
+    digest = f"{hashlib.sha256(image_data).hexdigest()}:{settings_key}"
+    results = ocr_cache.get_exact(digest)
+    if results is not None:
+        logger.info("OCR-Cache Treffer (exakt)")
+        metrics.increment('ocr_cache_lookups_total', result='exact')
+        return results, True
+
+    loop = asyncio.get_running_loop()
+    with metrics.timer('fingerprint'):
+        dhash, thumbnail = await loop.run_in_executor(ocr_executor, image_fingerprint, image_data)
+    candidates = ocr_cache.find_candidates(dhash, settings_key)
+    if candidates:
+        match = await asyncio.to_thread(find_matching_thumbnail, thumbnail, candidates)
+        results = ocr_cache.get_similar(match) if match else None
+        if results is not None:
+            logger.info("OCR-Cache Treffer (ähnliches Bild)")
+            # Exakten Hash ebenfalls merken, damit der nächste Repost direkt trifft
+            ocr_cache.put(digest, dhash, thumbnail, results, settings_key)
+            metrics.increment('ocr_cache_lookups_total', result='similar')
+            return results, True
+
+    ocr_cache.misses += 1
+    metrics.increment('ocr_cache_lookups_total', result='miss')
+    results = await run_ocr(image_data, settings)
+    # Leere Ergebnisse nicht merken, ein erneut geposteter Screenshot wird wieder erkannt
+    if results:
+        ocr_cache.put(digest, dhash, thumbnail, results, settings_key)
+    return results, False
+
+def check_attachment_limits(attachment) -> bool:
+    """Prüft Dateigröße und Pixelanzahl eines Anhangs anhand der Discord-Metadaten"""
+    if attachment.size > MAX_ATTACHMENT_BYTES:
+        logger.warning(f"Anhang {attachment.filename} ist zu groß ({attachment.size} Bytes), wird ignoriert")
+        return False
+    if attachment.width and attachment.height and attachment.width * attachment.height > MAX_IMAGE_PIXELS:
+        logger.warning(f"Anhang {attachment.filename} hat zu viele Pixel ({attachment.width}x{attachment.height}), wird ignoriert")
+        return False
+    return True
+
+def get_update_lock(channel_id: int) -> asyncio.Lock:
+    """Liefert den Lock eines Channels"""
+    if channel_id not in update_locks:
+        update_locks[channel_id] = asyncio.Lock()
+    return update_locks[channel_id]
+
+@asynccontextmanager
+async def channel_lock(channel_id: int):
+    """Sperrt den Channel und misst die Wartezeit auf den Lock"""
+    lock = get_update_lock(channel_id)
+    start = perf_counter()
+    await lock.acquire()
+    metrics.observe('lock_wait', perf_counter() - start)
+    try:
+        yield
+    finally:
+        lock.release()
+
+class LeaderboardEditScheduler:
+    """Fasst Leaderboard-Änderungen pro Channel zu einem Edit zusammen und verteilt Edits über Rate-Limits"""
+    MAX_WRITE_ROUNDS = 5  # Durchläufe mit je drei Versuchen, danach wird der Edit verworfen
+
+    def __init__(self, window: float, max_concurrent: int):
+        self.window = window
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.pending: Dict[int, Tuple[discord.TextChannel, ChannelConfig]] = {}
+        self.tasks: Dict[int, asyncio.Task] = {}
+        self.wakeups: Dict[int, asyncio.Event] = {}
+        self.flushing = set()
+        # Discord begrenzt Edits pro Channel: ein 429 pausiert nur diesen Channel, ein globales Limit alle
+        self.paused_until: Dict[int, float] = {}  # channel_id -> Ende der Pause (loop.time())
+        self.global_paused_until = 0.0
+        self.failed_rounds: Dict[int, int] = {}  # channel_id -> aufeinanderfolgende Durchläufe mit Rate-Limit
+
+    def schedule(self, channel: discord.TextChannel, config: ChannelConfig):
+        """Merkt einen Edit vor, mehrere Änderungen im Fenster ergeben einen Edit"""
+        self.pending[channel.id] = (channel, config)
+        if channel.id not in self.tasks:
+            self.wakeups[channel.id] = asyncio.Event()
+            self.tasks[channel.id] = asyncio.create_task(self._run(channel.id))
+
+    async def flush(self, channel_id: int):
+        """Schreibt ausstehende Änderungen eines Channels sofort und wartet auf den Edit"""
+        task = self.tasks.get(channel_id)
+        if task is None:
+            return
+        self.flushing.add(channel_id)
+        try:
+            self.wakeups[channel_id].set()
+            await task
+        finally:
+            self.flushing.discard(channel_id)
+
+    async def _run(self, channel_id: int):
+        try:
+            while channel_id in self.pending:
+                if channel_id not in self.flushing:
+                    try:
+                        await asyncio.wait_for(self.wakeups[channel_id].wait(), self.window)
+                    except asyncio.TimeoutError:
+                        pass
+                self.wakeups[channel_id].clear()
+                await self._write(channel_id)
+        finally:
+            self.tasks.pop(channel_id, None)
+            self.wakeups.pop(channel_id, None)
+
+    async def _write(self, channel_id: int):
+        item = self.pending.pop(channel_id, None)
+        if item is None:
+            return
+        channel, config = item
+        if not is_current_config(config):
+            return  # Channel wurde inzwischen entfernt
+
+        async with self.semaphore:
+            # Inhalt erst jetzt erzeugen, damit alle Änderungen im Fenster enthalten sind
+            async with channel_lock(channel_id):
+                # Beendete Challenge: der Endstand darf nicht wieder zum Zwischenstand werden
+                pages = config.get_renderer().render(config.leaderboard.sorted_entries(), config.post_ids, final=not config.is_active)
+
+            if await self.write_pages(channel, config, pages) is not None:
+                self.failed_rounds.pop(channel_id, None)
+                return
+
+            rounds = self.failed_rounds.get(channel_id, 0) + 1
+            if rounds >= self.MAX_WRITE_ROUNDS:
+                # Nicht endlos wiederholen, die nächste Änderung schreibt alle abweichenden Posts
+                self.failed_rounds.pop(channel_id, None)
+                logger.error(f"Leaderboard-Edit in Channel {channel.name} nach {rounds} Durchläufen verworfen")
+                return
+            # Nicht verlieren: beim nächsten Durchlauf erneut versuchen
+            self.failed_rounds[channel_id] = rounds
+            logger.error(f"Leaderboard-Edit in Channel {channel.name} nach mehreren Versuchen fehlgeschlagen")
+            self.pending.setdefault(channel_id, item)
+
+    async def write_pages(self, channel: discord.TextChannel, config: ChannelConfig, pages: List[Tuple[int, str]]) -> Optional[bool]:
+        """Bearbeitet alle Posts, deren Inhalt sich geändert hat
+
+        Liefert True bei Erfolg, False bei einem nicht behebbaren Fehler und None, wenn
+        das Rate-Limit auch nach mehreren Versuchen noch greift.
+        """
+        renderer = config.get_renderer()
+        changed = renderer.changed(pages)
+        if len(changed) < len(pages):
+            metrics.increment('leaderboard_post_edits_total', len(pages) - len(changed), status='unchanged')
+
+        loop = asyncio.get_running_loop()
+        for post_id, content in changed:
+            for attempt in range(3):
+                delay = max(self.paused_until.get(channel.id, 0.0), self.global_paused_until) - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                try:
+                    leaderboard_post = channel.get_partial_message(post_id)
+                    with metrics.timer('edit'):
+                        await leaderboard_post.edit(content=content)
+                    renderer.sent[post_id] = content
+                    metrics.increment('leaderboard_post_edits_total', status='edited')
+                    break
+                except discord.RateLimited as e:
+                    # discord.py wartet globale Limits selbst ab, RateLimited betrifft den Bucket des Channels
+                    retry_after = e.retry_after
+                    is_global = False
+                except discord.HTTPException as e:
+                    if e.status != 429:
+                        log_edit_error(channel, post_id, e)
+                        return False
+                    retry_after = self.window
+                    is_global = is_global_rate_limit(e)
+                resume_at = loop.time() + retry_after
+                if is_global:
+                    logger.warning(f"Globales Rate-Limit beim Leaderboard-Edit in Channel {channel.name}, alle Channels warten {retry_after:.1f}s")
+                    self.global_paused_until = max(self.global_paused_until, resume_at)
+                else:
+                    logger.warning(f"Rate-Limit beim Leaderboard-Edit in Channel {channel.name}, warte {retry_after:.1f}s")
+                    self.paused_until[channel.id] = max(self.paused_until.get(channel.id, 0.0), resume_at)
+            else:
+                return None
+
+        if changed:
+            logger.info(f"Leaderboard in Channel {channel.name} aktualisiert ({len(changed)} von {len(pages)} Posts geändert)")
+        return True
+
+def is_global_rate_limit(error: discord.HTTPException) -> bool:
+    """Prüft anhand der Antwort-Header, ob ein 429 das globale Limit des Bots ist"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    return headers.get('X-RateLimit-Global', '').lower() == 'true' or headers.get('X-RateLimit-Scope') == 'global'
+
+def log_edit_error(channel: discord.TextChannel, post_id: int, error: discord.HTTPException):
+    """Protokolliert einen fehlgeschlagenen Leaderboard-Edit"""
+    if isinstance(error, discord.NotFound):
+        logger.error(f"Leaderboard Post {post_id} nicht gefunden")
+    elif isinstance(error, discord.Forbidden):
+        logger.error(f"Keine Berechtigung zum Bearbeiten des Posts in Channel {channel.name}")
+    else:
+        logger.error(f"Fehler beim Aktualisieren des Leaderboards: {error}")
+
+edit_scheduler = LeaderboardEditScheduler(EDIT_DEBOUNCE_SECONDS, MAX_CONCURRENT_EDITS)
+
+async def resync_leaderboard(channel: discord.TextChannel, config: ChannelConfig) -> Leaderboard:
+    """Baut den Leaderboard-Zustand aus den Discord-Posts neu auf"""
+    renderer = config.get_renderer()
+    contents = []
+    for post_id in config.post_ids:
+        with metrics.timer('fetch_message'):
+            leaderboard_post = await channel.fetch_message(post_id)
+        # Gelesener Inhalt gilt als geschrieben, unveränderte Posts werden danach nicht bearbeitet
+        renderer.sent[post_id] = leaderboard_post.content
+        contents.append(leaderboard_post.content)
+    config.leaderboard = Leaderboard.from_parsed(parse_leaderboard('\n'.join(contents)), config.driver_mappings)
+    save_channel_config(config)
+    season_standings.update_channel(channel.id, config.leaderboard.sorted_entries())
+    logger.info(f"Leaderboard in Channel {channel.name} aus dem Post geladen ({len(config.leaderboard.entries)} Einträge)")
+    return config.leaderboard
+
+async def update_leaderboard(channel: discord.TextChannel, config: ChannelConfig, new_results: List[Tuple[str, str, str, Optional[int]]]) -> int:
+    """Aktualisiert das Leaderboard mit neuen Ergebnissen (Fahrer, Discord-User, Zeit, Quell-Nachricht), liefert die Anzahl übernommener Zeiten"""
+    accepted = 0
     
     # Thread-Lock für diesen Channel
-    if channel.id not in update_locks:
-        update_locks[channel.id] = asyncio.Lock()
-    
-    async with update_locks[channel.id]:
+    async with channel_lock(channel.id):
         try:
-            # Leaderboard Post abrufen
-            leaderboard_post = await channel.fetch_message(config.leaderboard_post_id)
+            if not is_current_config(config):
+                logger.info(f"Channel {channel.name} wurde entfernt, keine Updates")
+                return 0
             
-            # Prüfen ob Challenge noch aktiv ist
-            if not is_challenge_active(channel.name):
+            # Prüfen ob Challenge noch aktiv ist (bis zum Endstand werden noch rechtzeitig gepostete Zeiten angenommen)
+            if not config.is_active:
                 logger.info(f"Challenge in Channel {channel.name} ist beendet, keine Updates")
-                return
+                return 0
             
-            # Aktuelles Leaderboard parsen
-            current_content = leaderboard_post.content
-            leaderboard_entries = parse_leaderboard(current_content)
+            # Zustand liegt im Speicher, der Post wird nur beim ersten Mal gelesen
+            leaderboard = config.leaderboard
+            if leaderboard is None:
+                leaderboard = await resync_leaderboard(channel, config)
             
             # Neue Ergebnisse verarbeiten
-            updated = False
-            for driver_name, discord_user, race_time in new_results:
-                # Eindeutigen Identifier erstellen
-                identifier = f"{driver_name}_{discord_user}" if discord_user else driver_name
-                
-                # Prüfen ob bereits im Leaderboard
-                existing_entry = None
-                for entry in leaderboard_entries:
-                    if entry['identifier'] == identifier:
-                        existing_entry = entry
-                        break
-                
-                new_time_ms = time_to_milliseconds(race_time)
-                
-                if existing_entry:
-                    # Nur bessere Zeit übernehmen
-                    existing_time_ms = time_to_milliseconds(existing_entry['time'])
-                    if new_time_ms < existing_time_ms:
-                        existing_entry['time'] = race_time
-                        updated = True
-                        logger.info(f"Zeit verbessert für {driver_name}: {race_time}")
-                else:
-                    # Neuen Eintrag hinzufügen
-                    display_name = f"{driver_name} ({discord_user})" if discord_user and driver_name.lower() != discord_user.lower() else driver_name
-                    leaderboard_entries.append({
-                        'identifier': identifier,
-                        'display_name': display_name,
-                        'time': race_time,
-                        'time_ms': new_time_ms
-                    })
-                    updated = True
+            for driver_name, discord_user, race_time, message_id in new_results:
+                # Maßgeblich ist der Zeitpunkt des Posts, nicht der Abschluss der OCR
+                submitted_at = submission_time(message_id)
+                if not deadline_scheduler.is_open(channel.id, submitted_at):
+                    logger.info(f"Zeit von {driver_name} wurde nach dem Challenge-Ende gepostet, wird verworfen")
+                    continue
+                status = leaderboard.submit(driver_name, discord_user, race_time)
+                if status:
+                    record_result(channel.id, driver_name, discord_user, race_time, status, message_id, submitted_at)
+                if status == 'improved':
+                    accepted += 1
+                    logger.info(f"Zeit verbessert für {driver_name}: {race_time}")
+                elif status == 'new':
+                    accepted += 1
                     logger.info(f"Neuer Eintrag: {driver_name} - {race_time}")
             
-            if updated:
-                # Leaderboard sortieren
-                leaderboard_entries.sort(key=lambda x: x['time_ms'])
+            if accepted:
+                save_channel_config(config)
+                season_standings.update_channel(channel.id, leaderboard.sorted_entries())
                 
-                # Neuen Leaderboard-Content erstellen
-                new_content = format_leaderboard(leaderboard_entries)
-                
-                # Post aktualisieren
-                await leaderboard_post.edit(content=new_content)
-                logger.info(f"Leaderboard in Channel {channel.name} aktualisiert")
+                # Post-Edit vormerken, mehrere Updates kurz hintereinander ergeben einen Edit
+                edit_scheduler.schedule(channel, config)
         
         except discord.NotFound:
             logger.error(f"Leaderboard Post {config.leaderboard_post_id} nicht gefunden")
@@ -249,6 +2045,8 @@ async def update_leaderboard(channel: discord.TextChannel, config: ChannelConfig
             logger.error(f"Keine Berechtigung zum Bearbeiten des Posts in Channel {channel.name}")
         except Exception as e:
             logger.error(f"Fehler beim Aktualisieren des Leaderboards: {e}")
+    
+    return accepted
 
 def parse_leaderboard(content: str) -> List[Dict]:
     """Parst den aktuellen Leaderboard-Inhalt"""
@@ -273,10 +2071,14 @@ def parse_leaderboard(content: str) -> List[Dict]:
                 identifier = f"{driver_name}_{discord_user}"
             else:
                 # Nur Fahrername
+                driver_name = display_name
+                discord_user = None
                 identifier = display_name
             
             entries.append({
                 'identifier': identifier,
+                'driver_name': driver_name,
+                'discord_user': discord_user,
                 'display_name': display_name,
                 'time': race_time,
                 'time_ms': time_to_milliseconds(race_time)
@@ -284,32 +2086,240 @@ def parse_leaderboard(content: str) -> List[Dict]:
     
     return entries
 
-def format_leaderboard(entries: List[Dict]) -> str:
-    """Formatiert das Leaderboard für die Anzeige"""
-    now = datetime.now(GERMAN_TZ)
-    timestamp = now.strftime("%d.%m.%y um %H:%M")
-    
-    content = f"Stand: {timestamp}\n"
-    
-    medals = ['🥇', '🥈', '🥉']
-    points = [25, 22, 20, 18, 16, 14, 12, 10, 8, 6, 4, 2, 1]
-    
-    for i, entry in enumerate(entries):
-        if i < 3:
-            symbol = medals[i]
-        else:
-            symbol = f"{i + 1}."
-        
-        entry_points = points[i] if i < len(points) else 1
-        content += f"{symbol} | {entry['time']} | {entry_points} Punkte | {entry['display_name']}\n"
-    
-    return content
+LEADERBOARD_POINTS = [25, 22, 20, 18, 16, 14, 12, 10, 8, 6, 4, 2, 1]
+
+def points_for_rank(rank: int) -> int:
+    """Punkte für einen Platz (1-basiert), ab Platz 13 gibt es 1 Punkt"""
+    return LEADERBOARD_POINTS[rank - 1] if rank <= len(LEADERBOARD_POINTS) else 1
+
+LEADERBOARD_MEDALS = ['🥇', '🥈', '🥉']
+LEADERBOARD_EMPTY_PAGE = '\u200b'  # Discord lehnt leere Nachrichten ab, unbenutzte Posts bleiben so sichtbar leer
+
+def format_leaderboard_header(final: bool = False) -> str:
+    """Kopfzeile des Leaderboards: Zeitpunkt des Stands oder Endstand"""
+    if final:
+        return "Endstand"
+    return f"Stand: {datetime.now(GERMAN_TZ).strftime('%d.%m.%y um %H:%M')}"
+
+def format_leaderboard_line(rank: int, entry: Dict) -> str:
+    """Formatiert einen Leaderboard-Eintrag (Platz 1-basiert)"""
+    symbol = LEADERBOARD_MEDALS[rank - 1] if rank <= len(LEADERBOARD_MEDALS) else f"{rank}."
+    return f"{symbol} | {entry['time']} | {points_for_rank(rank)} Punkte | {entry['display_name']}"
+
+def paginate_leaderboard(header: str, lines: List[str], page_count: int, limit: int = None) -> Tuple[List[str], int]:
+    """Verteilt Kopfzeile und Einträge auf genau page_count Posts mit höchstens limit Zeichen
+
+    Einträge werden nicht zerteilt. Reicht der Platz nicht, endet der letzte Post mit einem
+    Hinweis. Liefert die Inhalte der Posts und die Anzahl nicht angezeigter Einträge.
+    """
+    limit = limit or LEADERBOARD_MESSAGE_LIMIT
+    pages: List[str] = []
+    current = [header]
+    length = len(header)
+    hidden = 0
+    for index, line in enumerate(lines):
+        separator = 1 if current else 0
+        if length + separator + len(line) <= limit:
+            current.append(line)
+            length += separator + len(line)
+            continue
+        if len(pages) + 1 < page_count:
+            pages.append('\n'.join(current))
+            current = [line]
+            length = len(line)
+            continue
+
+        # Letzter Post ist voll: so viele Einträge entfernen, bis der Hinweis passt
+        hidden = len(lines) - index
+        while True:
+            note = f"… und {hidden} weitere Einträge"
+            if length + 1 + len(note) <= limit or len(current) <= 1:
+                break
+            removed = current.pop()
+            length -= len(removed) + 1
+            hidden += 1
+        current.append(note)
+        break
+
+    pages.append('\n'.join(current))
+    pages.extend([LEADERBOARD_EMPTY_PAGE] * (page_count - len(pages)))
+    return pages, hidden
+
+class LeaderboardRenderer:
+    """Formatiert ein Leaderboard verteilt auf die Posts eines Channels
+
+    Formatierte Zeilen werden pro Platz zwischengespeichert und nur neu erzeugt, wenn sich
+    auf dem Platz Zeit oder Fahrer ändern. Zusätzlich wird der zuletzt geschriebene Inhalt
+    jedes Posts gemerkt, damit nur geänderte Posts bearbeitet werden.
+    """
+    def __init__(self):
+        self.keys: List[Tuple[str, str]] = []  # (Zeit, Anzeigename) pro Platz
+        self.lines: List[str] = []  # formatierte Zeile pro Platz
+        self.sent: Dict[int, str] = {}  # post_id -> zuletzt geschriebener bzw. gelesener Inhalt
+        self.hidden = 0  # Einträge, die zuletzt nicht mehr in die Posts passten
+
+    def render_lines(self, entries: List[Dict]) -> List[str]:
+        del self.keys[len(entries):]
+        del self.lines[len(entries):]
+        for i, entry in enumerate(entries):
+            key = (entry['time'], entry['display_name'])
+            if i < len(self.keys):
+                if self.keys[i] == key:
+                    continue
+                self.keys[i] = key
+                self.lines[i] = format_leaderboard_line(i + 1, entry)
+            else:
+                self.keys.append(key)
+                self.lines.append(format_leaderboard_line(i + 1, entry))
+        return self.lines
+
+    def render(self, entries: List[Dict], post_ids: List[int], final: bool = False) -> List[Tuple[int, str]]:
+        """Liefert (post_id, Inhalt) für alle Posts des Leaderboards"""
+        pages, hidden = paginate_leaderboard(format_leaderboard_header(final), self.render_lines(entries), len(post_ids))
+        if hidden and hidden != self.hidden:
+            logger.warning(f"Leaderboard passt nicht in {len(post_ids)} Post(s), {hidden} Einträge werden nicht angezeigt "
+                           f"(weitere Posts mit !add_challenge hinterlegen)")
+        self.hidden = hidden
+        return list(zip(post_ids, pages))
+
+    def changed(self, pages: List[Tuple[int, str]]) -> List[Tuple[int, str]]:
+        """Filtert die Posts heraus, deren Inhalt sich seit dem letzten Schreiben nicht geändert hat"""
+        return [(post_id, content) for post_id, content in pages if self.sent.get(post_id) != content]
+
+class SeasonStandings:
+    """Saisonwertung über alle Challenge-Channels, wird bei jeder Leaderboard-Änderung inkrementell nachgeführt"""
+    def __init__(self):
+        self.channels: Dict[int, Dict[str, Tuple[int, int, int, str]]] = {}  # channel_id -> identifier -> (Punkte, Platz, time_ms, Zeit)
+        self.driver_channels: Dict[str, Dict[int, Tuple[int, int, int, str]]] = {}  # identifier -> channel_id -> (...)
+        self.ended_channels = set()  # Siege zählen nur in beendeten Challenges
+        self.drivers: Dict[str, Dict] = {}  # identifier -> Saisonwerte
+        self._order: List[Tuple[int, int, int, str]] = []  # (-Punkte, -Siege, Bestzeit, identifier), aufsteigend sortiert
+
+    @staticmethod
+    def _sort_key(driver: Dict) -> Tuple[int, int, int, str]:
+        return (-driver['points'], -driver['wins'], driver['best_ms'], driver['identifier'])
+
+    def update_channel(self, channel_id: int, entries: List[Dict]):
+        """Übernimmt das aktuelle Leaderboard eines Channels, nur betroffene Fahrer werden neu berechnet"""
+        old = self.channels.get(channel_id, {})
+        new = {
+            entry['identifier']: (points_for_rank(rank), rank, entry['time_ms'], entry['time'])
+            for rank, entry in enumerate(entries, start=1)
+        }
+        self.channels[channel_id] = new
+        display_names = {entry['identifier']: entry['display_name'] for entry in entries}
+        for identifier in old.keys() | new.keys():
+            if old.get(identifier) == new.get(identifier):
+                continue
+            if identifier in new:
+                self.driver_channels.setdefault(identifier, {})[channel_id] = new[identifier]
+            else:
+                self.driver_channels[identifier].pop(channel_id, None)
+            self._refresh_driver(identifier, display_names.get(identifier))
+
+    def finish_channel(self, channel_id: int):
+        """Challenge beendet: der Erstplatzierte bekommt den Sieg gutgeschrieben"""
+        if channel_id in self.ended_channels:
+            return
+        self.ended_channels.add(channel_id)
+        for identifier, (_, rank, _, _) in self.channels.get(channel_id, {}).items():
+            if rank == 1:
+                self._refresh_driver(identifier)
+
+    def remove_channel(self, channel_id: int):
+        self.update_channel(channel_id, [])
+        del self.channels[channel_id]
+        self.ended_channels.discard(channel_id)
+
+    def _refresh_driver(self, identifier: str, display_name: Optional[str] = None):
+        driver = self.drivers.pop(identifier, None)
+        if driver:
+            del self._order[bisect_left(self._order, self._sort_key(driver))]
+
+        results = self.driver_channels.get(identifier)
+        if not results:
+            self.driver_channels.pop(identifier, None)
+            return
+
+        best_ms, best_time = min((time_ms, race_time) for _, _, time_ms, race_time in results.values())
+        driver = {
+            'identifier': identifier,
+            'display_name': display_name or (driver['display_name'] if driver else identifier),
+            'points': sum(points for points, _, _, _ in results.values()),
+            'wins': sum(1 for channel_id, (_, rank, _, _) in results.items() if rank == 1 and channel_id in self.ended_channels),
+            'challenges': len(results),
+            'best_ms': best_ms,
+            'best_time': best_time
+        }
+        self.drivers[identifier] = driver
+        insort(self._order, self._sort_key(driver))
+
+    def top(self, count: int) -> List[Dict]:
+        return [self.drivers[identifier] for _, _, _, identifier in self._order[:count]]
+
+    def rebuild(self, configs: List[ChannelConfig]):
+        """Baut die Saisonwertung komplett aus gespeicherten Leaderboards neu auf"""
+        self.__init__()
+        for config in configs:
+            if not config.is_active:
+                self.ended_channels.add(config.channel_id)
+            if config.leaderboard is not None:
+                self.update_channel(config.channel_id, config.leaderboard.sorted_entries())
+        logger.info(f"Saisonwertung aus {len(self.channels)} Challenges aufgebaut ({len(self.drivers)} Fahrer)")
+
+season_standings = SeasonStandings()
 
 @bot.event
 async def on_ready():
     """Bot ist bereit"""
-    logger.info(f'{bot.user} ist online!')
-    check_challenge_end.start()
+    logger.info(f'{bot.user} ist online!' + (f' ({bot.shard_count} Shards)' if BOT_SHARDED else ''))
+    # Challenge-Enden aller aktiven Channels einplanen, verpasste Enden werden sofort nachgeholt
+    for channel_id, config in list(channel_configs.items()):
+        channel = bot.get_channel(channel_id)
+        if config.is_active and channel:
+            deadline_scheduler.set_channel(channel_id, channel.name)
+    deadline_scheduler.start()
+
+@bot.event
+async def on_guild_channel_update(before, after):
+    """Bei Umbenennung eines Challenge-Channels das Challenge-Ende neu berechnen"""
+    config = get_channel_config(after.id)
+    if config and config.is_active and before.name != after.name:
+        deadline_scheduler.set_channel(after.id, after.name)
+
+def register_metrics_gauges():
+    metrics.register_gauge('ocr_queue_depth', lambda: ocr_scheduler.qsize() if ocr_scheduler else 0)
+    metrics.register_gauge('ocr_remote_workers', lambda: getattr(ocr_executor, 'connections', 0))
+    metrics.register_gauge('pending_leaderboard_edits', lambda: len(edit_scheduler.pending))
+    metrics.register_gauge('dirty_channel_configs', lambda: len(dirty_configs))
+    metrics.register_gauge('locked_channels', lambda: sum(lock.locked() for lock in update_locks.values()))
+    metrics.register_gauge('ocr_cache_entries', lambda: len(ocr_cache.entries))
+
+async def start_metrics_server():
+    """Startet den lokalen HTTP-Endpunkt /metrics im Prometheus-Format"""
+    async def handle_metrics(request):
+        return web.Response(text=metrics.render_prometheus(), content_type='text/plain')
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, METRICS_HOST, METRICS_PORT).start()
+    logger.info(f"Metriken unter http://{METRICS_HOST}:{METRICS_PORT}/metrics verfügbar")
+
+@bot.event
+async def setup_hook():
+    """Initialisierung vor dem Verbindungsaufbau"""
+    register_metrics_gauges()
+    if METRICS_PORT:
+        await start_metrics_server()
+    open_storage()
+    load_all_channel_configs()
+    season_standings.rebuild(list(channel_configs.values()))
+    ocr_cache.load()
+    start_ocr_workers()
+    flush_configs.start()
+    save_ocr_cache.start()
 
 @bot.event
 async def on_message(message):
@@ -322,87 +2332,169 @@ async def on_message(message):
     
     # Prüfen ob Nachricht Bilder enthält
     if message.attachments:
-        config = load_channel_config(message.channel.id)
-        if config and config.is_active:
-            await process_images(message, config)
-
-async def process_images(message, config: ChannelConfig):
-    """Verarbeitet Bilder in einer Nachricht"""
-    for attachment in message.attachments:
-        if attachment.filename.lower().endswith(('.png', '.jpg', '.jpeg')):
+        config = get_channel_config(message.channel.id)
+        # Nach dem Challenge-Ende gepostete Screenshots gar nicht erst einreihen
+        if config and config.is_active and deadline_scheduler.is_open(message.channel.id, message.created_at):
+            # OCR läuft im Worker-Pool, die Nachricht wird nur eingereiht
+            await ocr_scheduler.put(message, config)
+
+def is_image_attachment(attachment) -> bool:
+    return attachment.filename.lower().endswith(('.png', '.jpg', '.jpeg'))
+
+async def recognize_attachment(channel_id: int, attachment, config: ChannelConfig) -> List[Tuple[str, str]]:
+    """Lädt einen Anhang herunter und extrahiert die Rennergebnisse, Fehler werden gezählt und weitergereicht"""
+    try:
+        # Bild herunterladen, die Verarbeitung erfolgt komplett im Speicher
+        with metrics.timer('attachment_read'):
+            image_data = await attachment.read()
+        
+        # Rennergebnisse extrahieren
+        race_results, cached = await recognize_image(image_data, config.get_ocr_settings())
+    except Exception:
+        metrics.increment('ocr_images_total', channel=channel_id, status='error')
+        raise
+    if cached:
+        status = 'cached'
+    else:
+        status = 'success' if race_results else 'empty'
+    metrics.increment('ocr_images_total', channel=channel_id, status=status)
+    return race_results
+
+def match_drivers(config: ChannelConfig, race_results: List[Tuple[str, str]], author_name: str) -> List[Tuple[str, str, str]]:
+    """Ordnet erkannte Fahrer den bekannten Fahrern des Channels zu"""
+    driver_index = config.get_driver_index()
+    known_results = []
+    for driver_name, race_time in race_results:
+        match = driver_index.lookup(driver_name)
+        if match:
+            found_driver, confidence = match
+            if confidence < 1.0:
+                logger.info(f"Fahrer '{driver_name}' als '{found_driver}' erkannt (Konfidenz {confidence:.2f})")
+            known_results.append((found_driver, config.driver_mappings[found_driver], race_time))
+    
+    # Bekannte Fahrer im Screenshot: nur diese verarbeiten
+    if known_results:
+        return known_results
+    
+    # Keine bekannten Fahrer, alle verarbeiten
+    processed_results = []
+    for driver_name, race_time in race_results:
+        # Discord-Username aus Nachricht ableiten
+        config.add_driver(driver_name, author_name)
+        processed_results.append((driver_name, author_name, race_time))
+    
+    return processed_results
+
+RESULT_COUNT_REACTIONS = ['1️⃣', '2️⃣', '3️⃣', '4️⃣', '5️⃣', '6️⃣', '7️⃣', '8️⃣', '9️⃣', '🔟']
+
+def result_reaction(accepted: int) -> str:
+    """Eine Reaktion pro Nachricht: ✅ für ein Ergebnis, ➖ wenn keine Zeit übernommen wurde, sonst die Anzahl übernommener Zeiten"""
+    if accepted == 0:
+        # Erkannt, aber keine neue Bestzeit oder nach dem Challenge-Ende gepostet
+        return '➖'
+    if accepted == 1:
+        return '✅'
+    return RESULT_COUNT_REACTIONS[min(accepted, len(RESULT_COUNT_REACTIONS)) - 1]
+
+async def process_images(message, config: ChannelConfig, ticket: Optional[int] = None):
+    """Verarbeitet Bilder in einer Nachricht, mit ticket in der Reihenfolge der Nachrichten des Channels"""
+    attachments = [
+        attachment for attachment in message.attachments
+        if is_image_attachment(attachment) and check_attachment_limits(attachment)
+    ]
+    if not attachments:
+        return
+    
+    # Alle Bilder der Nachricht parallel herunterladen und erkennen
+    semaphore = asyncio.Semaphore(MESSAGE_OCR_CONCURRENCY)
+    
+    async def recognize(attachment) -> List[Tuple[str, str]]:
+        async with semaphore:
             try:
-                # Bild herunterladen
-                image_data = await attachment.read()
-                image_path = f"temp_{attachment.filename}"
-                
-                with open(image_path, 'wb') as f:
-                    f.write(image_data)
-                
-                # Rennergebnisse extrahieren
-                race_results = extract_race_results(image_path)
-                
-                # Aufräumen
-                os.remove(image_path)
-                
-                if race_results:
-                    # Fahrer-Zuordnung
-                    processed_results = []
-                    existing_drivers = list(config.driver_mappings.keys())
-                    
-                    # Filtern basierend auf vorhandenen Fahrern
-                    if existing_drivers:
-                        for driver_name, race_time in race_results:
-                            # Case-insensitive Suche nach vorhandenen Fahrern
-                            found_driver = None
-                            for existing in existing_drivers:
-                                if existing.lower() == driver_name.lower():
-                                    found_driver = existing
-                                    break
-                            
-                            if found_driver:
-                                discord_user = config.driver_mappings[found_driver]
-                                processed_results.append((found_driver, discord_user, race_time))
-                    else:
-                        # Keine vorhandenen Fahrer, alle verarbeiten
-                        for driver_name, race_time in race_results:
-                            # Discord-Username aus Nachricht ableiten
-                            discord_user = message.author.display_name
-                            config.driver_mappings[driver_name] = discord_user
-                            processed_results.append((driver_name, discord_user, race_time))
-                    
-                    if processed_results:
-                        # Konfiguration speichern
-                        save_channel_config(config)
-                        
-                        # Leaderboard aktualisieren
-                        await update_leaderboard(message.channel, config, processed_results)
-                        
-                        # Bestätigung senden
-                        await message.add_reaction('✅')
-                
+                return await recognize_attachment(message.channel.id, attachment, config)
             except Exception as e:
                 logger.error(f"Fehler beim Verarbeiten des Bildes {attachment.filename}: {e}")
+                return []
+    
+    all_results = await asyncio.gather(*(recognize(attachment) for attachment in attachments))
+    if not any(all_results):
+        return
+    
+    try:
+        # Zuordnung und Update erst, wenn frühere Nachrichten des Channels durch sind
+        if ticket is not None:
+            await ocr_scheduler.wait_turn(message.channel.id, ticket)
+        try:
+            async with channel_lock(message.channel.id):
+                # Während der OCR entfernter Channel: nichts zuordnen und nichts speichern
+                if not is_current_config(config):
+                    logger.info(f"Channel {message.channel.name} wurde entfernt, Nachricht {message.id} wird verworfen")
+                    return
+                
+                # Fahrer-Zuordnung in der Reihenfolge der Anhänge
+                processed_results = []
+                for race_results in all_results:
+                    if race_results:
+                        processed_results.extend(
+                            result + (message.id,) for result in match_drivers(config, race_results, message.author.display_name)
+                        )
+                
+                # Konfiguration speichern
+                save_channel_config(config)
+            
+            # Leaderboard einmal für alle Bilder aktualisieren
+            accepted = await update_leaderboard(message.channel, config, processed_results)
+        finally:
+            if ticket is not None:
+                await ocr_scheduler.finish_turn(message.channel.id, ticket)
+        
+        # Bestätigung senden
+        await message.add_reaction(result_reaction(accepted))
+    except Exception as e:
+        logger.error(f"Fehler beim Verarbeiten der Bilder von Nachricht {message.id}: {e}")
 
 @bot.command(name='add_challenge')
 @commands.has_permissions(administrator=True)
-async def add_challenge(ctx, channel_id: int, leaderboard_post_id: int):
-    """Fügt einen Bot zu einem Challenge-Channel hinzu"""
+async def add_challenge(ctx, channel_id: int, leaderboard_post_id: int, *extra_post_ids: int):
+    """Fügt einen Bot zu einem Challenge-Channel hinzu, weitere Posts nehmen große Leaderboards auf"""
     try:
-        # Channel und Post validieren
+        # Channel und Posts validieren
         channel = bot.get_channel(channel_id)
         if not channel:
             await ctx.send(f"Channel mit ID {channel_id} nicht gefunden.")
             return
         
-        try:
-            post = await channel.fetch_message(leaderboard_post_id)
-        except discord.NotFound:
-            await ctx.send(f"Post mit ID {leaderboard_post_id} nicht gefunden.")
+        post_ids = [leaderboard_post_id, *extra_post_ids]
+        if len(set(post_ids)) != len(post_ids):
+            await ctx.send("Jeder Post darf nur einmal angegeben werden.")
+            return
+        for post_id in post_ids:
+            try:
+                await channel.fetch_message(post_id)
+            except discord.NotFound:
+                await ctx.send(f"Post mit ID {post_id} nicht gefunden.")
+                return
+        
+        config = get_channel_config(channel_id)
+        if config:
+            # Bestehende Challenge: nur die Posts ändern, Leaderboard und Zuordnungen bleiben erhalten
+            async with channel_lock(channel_id):
+                config.leaderboard_post_id = leaderboard_post_id
+                config.extra_post_ids = list(extra_post_ids)
+                config.get_renderer().sent.clear()
+            save_channel_config(config)
+            if config.is_active and config.leaderboard is not None:
+                edit_scheduler.schedule(channel, config)
+            await ctx.send(f"Leaderboard von {channel.mention} verwendet jetzt {len(post_ids)} Post(s).")
+            logger.info(f"Leaderboard-Posts in Channel {channel_id} geändert: {post_ids}")
             return
         
-        # Konfiguration erstellen
+        # Konfiguration erstellen, ein zuvor entfernter Channel darf wieder gespeichert werden
         config = ChannelConfig(channel_id, leaderboard_post_id)
+        config.extra_post_ids = list(extra_post_ids)
+        removed_channels.discard(channel_id)
         save_channel_config(config)
+        deadline_scheduler.set_channel(channel_id, channel.name)
         
         await ctx.send(f"Bot erfolgreich zu Channel {channel.mention} hinzugefügt!")
         logger.info(f"Bot zu Channel {channel_id} hinzugefügt")
@@ -416,13 +2508,15 @@ async def add_challenge(ctx, channel_id: int, leaderboard_post_id: int):
 async def remove_challenge(ctx, channel_id: int):
     """Entfernt den Bot von einem Challenge-Channel"""
     try:
-        config = load_channel_config(channel_id)
+        config = get_channel_config(channel_id)
         if not config:
             await ctx.send(f"Bot ist nicht in Channel {channel_id} aktiv.")
             return
         
         # Konfiguration entfernen
-        remove_channel_config(channel_id)
+        await remove_channel_config(channel_id)
+        deadline_scheduler.remove_channel(channel_id)
+        season_standings.remove_channel(channel_id)
         
         channel = bot.get_channel(channel_id)
         channel_name = channel.mention if channel else f"Channel {channel_id}"
@@ -434,45 +2528,268 @@ async def remove_challenge(ctx, channel_id: int):
         await ctx.send(f"Fehler beim Entfernen: {e}")
         logger.error(f"Fehler beim Entfernen von Channel {channel_id}: {e}")
 
-@tasks.loop(minutes=5)
-async def check_challenge_end():
-    """Prüft periodisch auf Challenge-Ende"""
+@bot.command(name='resync_leaderboard')
+@commands.has_permissions(administrator=True)
+async def resync_leaderboard_command(ctx, channel_id: int):
+    """Lädt den Leaderboard-Zustand neu aus dem Discord-Post"""
+    config = get_channel_config(channel_id)
+    channel = bot.get_channel(channel_id)
+    if not config or not channel:
+        await ctx.send(f"Bot ist nicht in Channel {channel_id} aktiv.")
+        return
+
     try:
-        # Alle Channel-Konfigurationen durchgehen
-        for filename in os.listdir('.'):
-            if filename.startswith('channel_') and filename.endswith('.json'):
-                channel_id = int(filename.replace('channel_', '').replace('.json', ''))
-                config = load_channel_config(channel_id)
-                
-                if config and config.is_active:
-                    channel = bot.get_channel(channel_id)
-                    if channel and not is_challenge_active(channel.name):
-                        await end_challenge(channel, config)
-    
+        async with channel_lock(channel_id):
+            leaderboard = await resync_leaderboard(channel, config)
+        await ctx.send(f"Leaderboard von {channel.mention} neu geladen ({len(leaderboard.entries)} Einträge).")
+    except discord.NotFound:
+        await ctx.send(f"Leaderboard-Post nicht gefunden (IDs: {', '.join(map(str, config.post_ids))}).")
+    except Exception as e:
+        await ctx.send(f"Fehler beim Neuladen: {e}")
+        logger.error(f"Fehler beim Neuladen des Leaderboards in Channel {channel_id}: {e}")
+
+def parse_backfill_since(value: str) -> datetime:
+    """Parst den Startzeitpunkt für !backfill (DD.MM.YY [HH:MM] oder ISO-Format)"""
+    for date_format in ('%d.%m.%y %H:%M', '%d.%m.%y', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M', '%Y-%m-%d'):
+        try:
+            return GERMAN_TZ.localize(datetime.strptime(value.strip(), date_format))
+        except ValueError:
+            continue
+    raise ValueError(f"Ungültiger Zeitpunkt: {value}")
+
+@bot.command(name='backfill')
+@commands.has_permissions(administrator=True)
+async def backfill(ctx, channel_id: int, *, since: Optional[str] = None):
+    """Liest Screenshots aus dem Channel-Verlauf nach und übernimmt die Zeiten gesammelt"""
+    config = get_channel_config(channel_id)
+    channel = bot.get_channel(channel_id)
+    if not config or not channel:
+        await ctx.send(f"Bot ist nicht in Channel {channel_id} aktiv.")
+        return
+    if not config.is_active or not deadline_scheduler.is_open(channel_id):
+        await ctx.send(f"Challenge in {channel.mention} ist bereits beendet.")
+        return
+
+    try:
+        after = parse_backfill_since(since) if since else None
+    except ValueError as e:
+        await ctx.send(f"{e} (Format: DD.MM.YY HH:MM)")
+        return
+
+    status_message = await ctx.send(f"Backfill für {channel.mention}: lese Verlauf ...")
+    start = perf_counter()
+
+    try:
+        # Alle Bild-Anhänge seit dem Startzeitpunkt einsammeln
+        jobs = []
+        message_count = 0
+        async for message in channel.history(limit=None, after=after, oldest_first=True):
+            if message.author.bot:
+                continue
+            message_count += 1
+            for attachment in message.attachments:
+                if is_image_attachment(attachment) and check_attachment_limits(attachment):
+                    jobs.append((message, attachment))
+
+        # OCR über die Worker mit niedriger Priorität, live gepostete Screenshots haben Vorrang
+        semaphore = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+        job_results: List[Optional[List[Tuple[str, str]]]] = [None] * len(jobs)
+        done = 0
+
+        async def run_job(index: int, message, attachment):
+            nonlocal done
+            async with semaphore:
+                try:
+                    job_results[index] = await ocr_scheduler.run_background(
+                        lambda: recognize_attachment(channel_id, attachment, config)
+                    )
+                except Exception as e:
+                    logger.error(f"Backfill: Fehler beim Verarbeiten des Bildes {attachment.filename}: {e}")
+            done += 1
+
+        async def report_progress():
+            # Eigener Task: ein fehlgeschlagener Edit bricht den Backfill nicht ab
+            while True:
+                await asyncio.sleep(BACKFILL_PROGRESS_INTERVAL)
+                rate = done / (perf_counter() - start)
+                try:
+                    await status_message.edit(content=f"Backfill für {channel.mention}: {done}/{len(jobs)} Bilder ({rate:.1f} Bilder/s)")
+                except discord.HTTPException as e:
+                    logger.warning(f"Backfill: Fortschritt konnte nicht angezeigt werden: {e}")
+
+        progress_task = asyncio.create_task(report_progress())
+        try:
+            await asyncio.gather(*(run_job(index, message, attachment) for index, (message, attachment) in enumerate(jobs)))
+        finally:
+            progress_task.cancel()
+
+        # Fahrer in zeitlicher Reihenfolge zuordnen und alles in einem Durchgang übernehmen
+        async with channel_lock(channel_id):
+            if not is_current_config(config):
+                await status_message.edit(content=f"Backfill für {channel.mention} abgebrochen: der Channel wurde entfernt.")
+                return
+            processed_results = []
+            for (message, _), race_results in zip(jobs, job_results):
+                if race_results:
+                    processed_results.extend(
+                        result + (message.id,) for result in match_drivers(config, race_results, message.author.display_name)
+                    )
+            if processed_results:
+                save_channel_config(config)
+
+        accepted = 0
+        if processed_results:
+            accepted = await update_leaderboard(channel, config, processed_results)
+            await edit_scheduler.flush(channel_id)
+
+        elapsed = perf_counter() - start
+        rate = len(jobs) / elapsed if elapsed else 0.0
+        await status_message.edit(content=(
+            f"Backfill für {channel.mention} abgeschlossen: {message_count} Nachrichten, {len(jobs)} Bilder, "
+            f"{len(processed_results)} Ergebnisse erkannt, {accepted} übernommen "
+            f"({elapsed:.1f}s, {rate:.1f} Bilder/s)"
+        ))
+        logger.info(f"Backfill in Channel {channel_id}: {len(jobs)} Bilder, {accepted} Zeiten übernommen in {elapsed:.1f}s")
+
+    except discord.Forbidden:
+        await status_message.edit(content=f"Keine Berechtigung, den Verlauf von {channel.mention} zu lesen.")
+    except Exception as e:
+        await status_message.edit(content=f"Fehler beim Backfill: {e}")
+        logger.error(f"Fehler beim Backfill in Channel {channel_id}: {e}")
+
+SEASON_MAX_LISTED = 25  # Mehr Zeilen passen nicht sicher in eine Discord-Nachricht
+
+@bot.command(name='season')
+async def season(ctx, count: int = 10):
+    """Zeigt die Saisonwertung über alle Challenges"""
+    drivers = season_standings.top(max(1, min(count, SEASON_MAX_LISTED)))
+    if not drivers:
+        await ctx.send("Noch keine Ergebnisse in dieser Saison.")
+        return
+
+    medals = ['🥇', '🥈', '🥉']
+    lines = [
+        f"**Saisonwertung** ({len(season_standings.channels)} Challenges, "
+        f"{len(season_standings.ended_channels)} beendet, laufende Challenges vorläufig)"
+    ]
+    for i, driver in enumerate(drivers):
+        symbol = medals[i] if i < 3 else f"{i + 1}."
+        lines.append(
+            f"{symbol} | {driver['points']} Punkte | {driver['wins']} Siege | {driver['challenges']} Challenges "
+            f"| Bestzeit {driver['best_time']} | {driver['display_name']}"
+        )
+    await ctx.send('\n'.join(lines)[:2000])
+
+@bot.command(name='season_rebuild')
+@commands.has_permissions(administrator=True)
+async def season_rebuild(ctx):
+    """Baut die Saisonwertung aus dem Speicher neu auf"""
+    start = perf_counter()
+    try:
+        # Erst ausstehende Änderungen schreiben, damit der Speicher aktuell ist
+        await asyncio.to_thread(write_channel_configs, *take_dirty_configs())
+        configs = await asyncio.to_thread(storage.load_configs)
+        season_standings.rebuild(configs)
+        await ctx.send(
+            f"Saisonwertung neu aufgebaut: {len(season_standings.channels)} Challenges, "
+            f"{len(season_standings.drivers)} Fahrer ({perf_counter() - start:.1f}s)"
+        )
     except Exception as e:
-        logger.error(f"Fehler bei der Challenge-Ende-Prüfung: {e}")
+        await ctx.send(f"Fehler beim Neuaufbau der Saisonwertung: {e}")
+        logger.error(f"Fehler beim Neuaufbau der Saisonwertung: {e}")
+
+@bot.command(name='stats')
+@commands.has_permissions(administrator=True)
+async def stats(ctx):
+    """Zeigt Latenzen, Warteschlangen und OCR-Statistiken"""
+    await ctx.send(metrics.summary()[:2000])
+
+@bot.command(name='ocr_settings')
+@commands.has_permissions(administrator=True)
+async def ocr_settings(ctx, channel_id: int, key: Optional[str] = None, *, value: Optional[str] = None):
+    """Zeigt oder ändert die OCR-Vorverarbeitung eines Channels"""
+    config = get_channel_config(channel_id)
+    if not config:
+        await ctx.send(f"Bot ist nicht in Channel {channel_id} aktiv.")
+        return
+
+    if key is None:
+        settings = config.get_ocr_settings()
+        lines = [f"• `{name}`: `{json.dumps(setting)}`" for name, setting in settings.items()]
+        await ctx.send("**OCR-Einstellungen:**\n" + '\n'.join(lines))
+        return
+
+    if key not in DEFAULT_OCR_SETTINGS:
+        await ctx.send(f"Unbekannte Einstellung `{key}`. Erlaubt: {', '.join(DEFAULT_OCR_SETTINGS)}")
+        return
+
+    if value is None or value == 'default':
+        config.ocr_settings.pop(key, None)
+    else:
+        try:
+            parsed = json.loads(value)
+        except json.JSONDecodeError:
+            parsed = value
+        try:
+            config.ocr_settings[key] = validate_ocr_setting(key, parsed)
+        except ValueError as e:
+            await ctx.send(f"Ungültiger Wert `{value}` für `{key}`: {e}")
+            return
+    save_channel_config(config)
 
-async def end_challenge(channel: discord.TextChannel, config: ChannelConfig):
-    """Beendet eine Challenge"""
+    await ctx.send(f"OCR-Einstellung `{key}` ist jetzt `{json.dumps(config.get_ocr_settings()[key])}`")
+    logger.info(f"OCR-Einstellung {key} für Channel {channel_id} geändert")
+
+@tasks.loop(seconds=CONFIG_FLUSH_INTERVAL)
+async def flush_configs():
+    """Schreibt geänderte Channel-Konfigurationen im Hintergrund"""
+    snapshots, results, removed = take_dirty_configs()
+    if snapshots or results or removed:
+        await asyncio.to_thread(write_channel_configs, snapshots, results, removed)
+
+@tasks.loop(minutes=10)
+async def save_ocr_cache():
+    """Speichert den OCR-Cache periodisch"""
+    logger.info(f"OCR-Cache Statistik: {ocr_cache.stats()}")
+    await asyncio.to_thread(ocr_cache.save)
+
+async def end_challenge(channel: discord.TextChannel, config: ChannelConfig) -> bool:
+    """Beendet eine Challenge, liefert False, wenn der Endstand nicht geschrieben werden konnte"""
     try:
-        leaderboard_post = await channel.fetch_message(config.leaderboard_post_id)
-        current_content = leaderboard_post.content
+        # Vor dem Ende gepostete Screenshots noch auswerten, sie zählen auch nach der Deadline
+        if ocr_scheduler and not await ocr_scheduler.drain(channel.id, OCR_DRAIN_TIMEOUT):
+            logger.warning(f"OCR für Channel {channel.name} nach {OCR_DRAIN_TIMEOUT:.0f}s nicht abgeschlossen, beende trotzdem")
+        
+        # Ab jetzt keine Updates mehr, ein später übernommenes Ergebnis würde sonst den Endstand überschreiben
+        async with channel_lock(channel.id):
+            if config.leaderboard is None:
+                await resync_leaderboard(channel, config)
+            config.is_active = False
         
-        # Header zu "Endstand" ändern
-        lines = current_content.split('\n')
-        if lines:
-            lines[0] = "Endstand"
-            new_content = '\n'.join(lines)
-            await leaderboard_post.edit(content=new_content)
+        # Endstand über den Edit-Scheduler schreiben: ein noch laufender Edit des Channels ist vorher fertig,
+        # inaktive Channels rendert er als Endstand. Geändert wird meist nur der Post mit der Kopfzeile.
+        edit_scheduler.schedule(channel, config)
+        await edit_scheduler.flush(channel.id)
+        async with channel_lock(channel.id):
+            pages = config.get_renderer().render(config.leaderboard.sorted_entries(), config.post_ids, final=True)
+            written = not config.get_renderer().changed(pages)
+            if not written:
+                # Wieder aktiv, damit der Deadline-Scheduler es erneut versucht
+                config.is_active = True
+        if not written:
+            logger.error(f"Endstand in Channel {channel.name} konnte nicht geschrieben werden")
+            return False
         
-        # Konfiguration als inaktiv markieren
-        config.is_active = False
+        # Konfiguration als inaktiv speichern
         save_channel_config(config)
+        season_standings.finish_channel(channel.id)
         
         logger.info(f"Challenge in Channel {channel.name} beendet")
+        return True
         
     except Exception as e:
         logger.error(f"Fehler beim Beenden der Challenge in Channel {channel.name}: {e}")
+        return False
 
 @bot.command(name='help_challenge')
 async def help_challenge(ctx):
@@ -481,8 +2798,16 @@ async def help_challenge(ctx):
 **Carrera Hybrid Challenge Bot - Hilfe**
 
 **Admin-Commands:**
-• `!add_challenge <channel_id> <leaderboard_post_id>` - Bot zu Channel hinzufügen
+• `!add_challenge <channel_id> <leaderboard_post_id> [weitere_post_ids...]` - Bot zu Channel hinzufügen bzw. Leaderboard-Posts ändern
 • `!remove_challenge <channel_id>` - Bot von Channel entfernen
+• `!resync_leaderboard <channel_id>` - Leaderboard neu aus dem Post laden
+• `!ocr_settings <channel_id> [einstellung] [wert]` - OCR-Vorverarbeitung anzeigen/ändern
+• `!backfill <channel_id> [DD.MM.YY HH:MM]` - Screenshots aus dem Verlauf nachlesen
+• `!stats` - Latenzen, Warteschlangen und OCR-Statistiken anzeigen
+• `!season_rebuild` - Saisonwertung aus dem Speicher neu aufbauen
+
+**Commands für alle:**
+• `!season [anzahl]` - Saisonwertung über alle Challenges anzeigen
 
 **Nutzung:**
 1. Poste Screenshots der Carrera Hybrid App Rennergebnisse
@@ -499,10 +2824,23 @@ async def help_challenge(ctx):
     await ctx.send(help_text)
 
 if __name__ == '__main__':
+    # python main.py worker: nur OCR-Worker-Prozesse, ohne Discord-Verbindung
+    if sys.argv[1:2] == ['worker']:
+        run_worker_fleet()
+        exit(0)
+    
     # Bot Token aus Umgebungsvariable
     bot_token = os.getenv('DISCORD_BOT_TOKEN')
     if not bot_token:
         logger.error("DISCORD_BOT_TOKEN Umgebungsvariable nicht gesetzt!")
         exit(1)
     
-    bot.run(bot_token)
\ No newline at end of file
+    try:
+        bot.run(bot_token)
+    finally:
+        stop_ocr_workers()
+        # storage ist noch None, wenn der Bot vor setup_hook abbricht (z.B. ungültiger Token)
+        if storage is not None:
+            flush_channel_configs()
+            storage.close()
+        ocr_cache.save()
\ No newline at end of file
@@ -0,0 +1,94 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import main
+from main import ChannelConfig, SqliteStorage
+
+
+@pytest.fixture(autouse=True)
+def config_state(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    storage = SqliteStorage(str(tmp_path / 'bot.db'))
+    monkeypatch.setattr(main, 'storage', storage)
+    for name, value in (('channel_configs', {}), ('dirty_configs', set()), ('pending_results', []),
+                        ('removed_channels', set()), ('pending_deletes', set())):
+        monkeypatch.setattr(main, name, value)
+    monkeypatch.setattr(main, 'season_standings', main.SeasonStandings())
+    yield storage
+    storage.close()
+
+
+def make_message(channel_id):
+    async def add_reaction(emoji):
+        reactions.append(emoji)
+
+    reactions = []
+    channel = SimpleNamespace(id=channel_id, name=f'challenge-{channel_id}')
+    attachment = SimpleNamespace(filename='zeit.png', size=1000, width=None, height=None)
+    return SimpleNamespace(id=1234, channel=channel, author=SimpleNamespace(display_name='falke'),
+                           attachments=[attachment], add_reaction=add_reaction, reactions=reactions)
+
+
+def test_in_flight_message_does_not_restore_removed_channel(config_state, monkeypatch):
+    config = ChannelConfig(1, 10)
+    main.save_channel_config(config)
+    main.flush_channel_configs()
+
+    async def run():
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def recognize_attachment(channel_id, attachment, config):
+            started.set()
+            await release.wait()
+            return [('FALKE', '01:10.000')]
+
+        monkeypatch.setattr(main, 'recognize_attachment', recognize_attachment)
+        message = make_message(1)
+        job = asyncio.create_task(main.process_images(message, config))
+        await started.wait()
+        # !remove_challenge, während die OCR der Nachricht noch läuft
+        await main.remove_channel_config(1)
+        release.set()
+        await job
+        return message
+
+    message = asyncio.run(run())
+    main.flush_channel_configs()
+    assert main.get_channel_config(1) is None
+    assert config_state.load_configs() == []
+    assert 1 not in main.season_standings.channels
+    assert message.reactions == []
+
+
+def test_only_add_challenge_clears_the_removal():
+    stale = ChannelConfig(1, 10)
+    main.save_channel_config(stale)
+    asyncio.run(main.remove_channel_config(1))
+
+    main.save_channel_config(stale)
+    assert main.get_channel_config(1) is None
+
+    # Wie !add_challenge: neue Konfiguration nach Aufheben der Markierung
+    main.removed_channels.discard(1)
+    fresh = ChannelConfig(1, 20)
+    main.save_channel_config(fresh)
+    # Ein später fertiger Job mit der alten Konfiguration überschreibt sie nicht
+    main.save_channel_config(stale)
+    assert main.get_channel_config(1) is fresh
+    main.flush_channel_configs()
+    loaded, = main.storage.load_configs()
+    assert loaded.leaderboard_post_id == 20
+
+
+def test_update_leaderboard_ignores_removed_channel():
+    config = ChannelConfig(1, 10)
+    config.leaderboard = main.Leaderboard()
+    channel = SimpleNamespace(id=1, name='challenge-1')
+
+    async def run():
+        return await main.update_leaderboard(channel, config, [('FALKE', 'falke', '01:10.000', None)])
+
+    assert asyncio.run(run()) == 0
+    assert config.leaderboard.entries == {}
@@ -0,0 +1,52 @@
+from main import BKTree, DriverIndex, edit_distance, normalize_driver_name
+
+
+def test_edit_distance():
+    assert edit_distance('kobra', 'kobra') == 0
+    assert edit_distance('kobra', 'cobra') == 1
+    assert edit_distance('', 'abc') == 3
+
+
+def test_bktree_search_sorted_by_distance():
+    tree = BKTree()
+    for key in ('schumi', 'schumii', 'falke', 'phantom', 'schumo'):
+        tree.add(key)
+    assert tree.search('schumi', 1) == [(0, 'schumi'), (1, 'schumii'), (1, 'schumo')]
+    assert tree.search('xyz', 1) == []
+
+
+def test_normalize_driver_name():
+    assert normalize_driver_name('  Jörg   WEIß ') == 'jorg weiss'
+
+
+def test_lookup_exact_and_normalized():
+    index = DriverIndex(['Falke', 'White Dragon'])
+    assert index.lookup('Falke') == ('Falke', 1.0)
+    assert index.lookup('WHITE  DRAGON') == ('White Dragon', 1.0)
+
+
+def test_lookup_confusable_unique():
+    index = DriverIndex(['KOBRA'])
+    assert index.lookup('K0BRA') == ('KOBRA', 1.0)
+
+
+def test_confusable_names_stay_separate():
+    # MAX1 und MAXI unterscheiden sich nur durch eine OCR-Verwechslung
+    index = DriverIndex(['MAX1', 'MAXI'])
+    assert index.lookup('MAX1') == ('MAX1', 1.0)
+    assert index.lookup('MAXI') == ('MAXI', 1.0)
+    # Mehrdeutig: weder exakt noch eindeutig über die Verwechslung zuzuordnen
+    assert index.lookup('MAXl') is None
+
+
+def test_lookup_typo_respects_confidence():
+    index = DriverIndex(['PHANTOMAS'])
+    name, confidence = index.lookup('PHANTOMAZ', min_confidence=0.85)
+    assert name == 'PHANTOMAS'
+    assert confidence >= 0.85
+    assert index.lookup('PHANTOM', min_confidence=0.85) is None
+
+
+def test_lookup_tie_is_not_matched():
+    index = DriverIndex(['ANNA', 'ANNE'])
+    assert index.lookup('ANNX', min_confidence=0.7) is None
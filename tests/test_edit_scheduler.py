@@ -0,0 +1,145 @@
+import asyncio
+from types import SimpleNamespace
+
+import discord
+import pytest
+
+import main
+from fake_discord import FakeResponse
+from main import ChannelConfig, Leaderboard, LeaderboardEditScheduler
+
+
+class FakeChannel:
+    """Channel mit langsamen Edits, damit Updates in das Schreiben des Endstands fallen"""
+    def __init__(self, channel_id: int, edit_delay: float = 0.0):
+        self.id = channel_id
+        self.name = f'challenge-{channel_id}'
+        self.edit_delay = edit_delay
+        self.posts = {}
+
+    def get_partial_message(self, post_id: int):
+        async def edit(content: str):
+            await asyncio.sleep(self.edit_delay)
+            self.posts[post_id] = content
+
+        return SimpleNamespace(edit=edit)
+
+
+@pytest.fixture(autouse=True)
+def scheduler_state(monkeypatch):
+    monkeypatch.setattr(main, 'channel_configs', {})
+    monkeypatch.setattr(main, 'dirty_configs', set())
+    monkeypatch.setattr(main, 'pending_results', [])
+    monkeypatch.setattr(main, 'season_standings', main.SeasonStandings())
+    monkeypatch.setattr(main, 'ocr_scheduler', None)
+
+
+def make_config(channel_id: int) -> ChannelConfig:
+    config = ChannelConfig(channel_id, channel_id * 10)
+    config.leaderboard = Leaderboard()
+    config.leaderboard.submit('FALKE', 'falke', '01:10.000')
+    main.save_channel_config(config)
+    return config
+
+
+def test_update_during_end_does_not_overwrite_final_post(monkeypatch):
+    monkeypatch.setattr(main, 'edit_scheduler', LeaderboardEditScheduler(0.01, 2))
+    config = make_config(1)
+    channel = FakeChannel(1, edit_delay=0.05)
+
+    async def run():
+        ending = asyncio.create_task(main.end_challenge(channel, config))
+        await asyncio.sleep(0.02)
+        # Verspätetes Ergebnis, z.B. aus einem Backfill, während der Endstand geschrieben wird
+        accepted = await main.update_leaderboard(channel, config, [('KOBRA', 'kobra', '01:05.000', None)])
+        ended = await ending
+        await asyncio.sleep(0.1)
+        return accepted, ended
+
+    accepted, ended = asyncio.run(run())
+    assert ended is True
+    assert accepted == 0
+    assert config.is_active is False
+    assert channel.posts[10].startswith('Endstand')
+    assert 'KOBRA' not in channel.posts[10]
+
+
+def test_pending_edit_of_ended_challenge_renders_final(monkeypatch):
+    scheduler = LeaderboardEditScheduler(0.01, 2)
+    config = make_config(1)
+    config.is_active = False
+    channel = FakeChannel(1)
+
+    async def run():
+        scheduler.schedule(channel, config)
+        await scheduler.flush(1)
+
+    asyncio.run(run())
+    assert channel.posts[10].startswith('Endstand')
+
+
+def test_failed_final_write_keeps_challenge_open(monkeypatch):
+    monkeypatch.setattr(main, 'edit_scheduler', LeaderboardEditScheduler(0.01, 2))
+    config = make_config(1)
+    channel = FakeChannel(1)
+
+    def get_partial_message(post_id):
+        async def edit(content):
+            raise discord.NotFound(FakeResponse(404, 'Not Found'), 'Unknown Message')
+
+        return SimpleNamespace(edit=edit)
+
+    channel.get_partial_message = get_partial_message
+    # Der Deadline-Scheduler versucht es nur bei aktiven Challenges erneut
+    assert asyncio.run(main.end_challenge(channel, config)) is False
+    assert config.is_active is True
+
+
+def rate_limited_channel(channel_id: int, error: Exception) -> FakeChannel:
+    """Der erste Edit scheitert mit error, alle weiteren gelingen"""
+    channel = FakeChannel(channel_id)
+    channel.failed = False
+    edit = channel.get_partial_message
+
+    def get_partial_message(post_id):
+        if not channel.failed:
+            channel.failed = True
+
+            async def fail(content):
+                raise error
+
+            return SimpleNamespace(edit=fail)
+        return edit(post_id)
+
+    channel.get_partial_message = get_partial_message
+    return channel
+
+
+def time_writes(scheduler, limited, other):
+    async def write(channel, delay):
+        await asyncio.sleep(delay)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        assert await scheduler.write_pages(channel, make_config(channel.id), [(channel.id * 10, 'Stand')])
+        return loop.time() - start
+
+    async def run():
+        return await asyncio.gather(write(limited, 0), write(other, 0.01))
+
+    return asyncio.run(run())
+
+
+def test_rate_limit_pauses_only_its_channel():
+    scheduler = LeaderboardEditScheduler(0.01, 5)
+    limited_time, other_time = time_writes(scheduler, rate_limited_channel(1, discord.RateLimited(0.3)), FakeChannel(2))
+    assert limited_time >= 0.3
+    assert other_time < 0.1
+
+
+def test_global_rate_limit_pauses_all_channels():
+    scheduler = LeaderboardEditScheduler(0.3, 5)
+    response = SimpleNamespace(status=429, reason='Too Many Requests', headers={'X-RateLimit-Global': 'true'})
+    error = discord.HTTPException(response, 'You are being rate limited.')
+    limited_time, other_time = time_writes(scheduler, rate_limited_channel(1, error), FakeChannel(2))
+    assert limited_time >= 0.3
+    assert other_time >= 0.25
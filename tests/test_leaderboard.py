@@ -0,0 +1,21 @@
+from main import Leaderboard
+
+
+def test_submit_new_improved_and_slower():
+    leaderboard = Leaderboard()
+    assert leaderboard.submit('FALKE', 'falke', '01:10.000') == 'new'
+    assert leaderboard.submit('FALKE', 'falke', '01:12.000') is None
+    assert leaderboard.submit('FALKE', 'falke', '01:09.500') == 'improved'
+    assert leaderboard.entries['FALKE_falke']['time'] == '01:09.500'
+
+
+def test_sorted_entries_and_roundtrip():
+    leaderboard = Leaderboard()
+    leaderboard.submit('B', 'b', '01:20.000')
+    leaderboard.submit('A', None, '01:05.000')
+    leaderboard.submit('C', 'carl', '01:10.000')
+    leaderboard.submit('B', 'b', '01:00.000')
+    assert [entry['driver_name'] for entry in leaderboard.sorted_entries()] == ['B', 'A', 'C']
+    assert leaderboard.entries['C_carl']['display_name'] == 'C (carl)'
+    restored = Leaderboard.from_list(leaderboard.to_list())
+    assert restored.to_list() == leaderboard.to_list()
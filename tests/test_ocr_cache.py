@@ -0,0 +1,58 @@
+import asyncio
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+import main
+from main import OCRError, OCRResultCache
+
+
+def make_image() -> bytes:
+    buffer = BytesIO()
+    Image.new('RGB', (64, 32), (200, 30, 30)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = OCRResultCache(max_entries=10, max_distance=4)
+    monkeypatch.setattr(main, 'ocr_cache', cache)
+    return cache
+
+
+def fake_ocr(monkeypatch, outcomes):
+    calls = []
+
+    async def run_ocr(image_data, settings=None):
+        calls.append(settings)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(main, 'run_ocr', run_ocr)
+    return calls
+
+
+def test_failed_and_empty_results_are_not_cached(cache, monkeypatch):
+    image = make_image()
+    calls = fake_ocr(monkeypatch, [OCRError('tesseract fehlt'), [], [('FALKE', '01:10.000')]])
+
+    with pytest.raises(OCRError):
+        asyncio.run(main.recognize_image(image))
+    assert asyncio.run(main.recognize_image(image)) == ([], False)
+    assert asyncio.run(main.recognize_image(image)) == ([('FALKE', '01:10.000')], False)
+    assert asyncio.run(main.recognize_image(image)) == ([('FALKE', '01:10.000')], True)
+    assert len(calls) == 3
+
+
+def test_settings_are_part_of_the_cache_key(cache, monkeypatch):
+    image = make_image()
+    calls = fake_ocr(monkeypatch, [[('FALKE', '01:10.000')], [('FALKE', '01:01.000')]])
+
+    assert asyncio.run(main.recognize_image(image, {'threshold': 120})) == ([('FALKE', '01:10.000')], False)
+    # Nach !ocr_settings wird das Bild neu erkannt, auch als ähnliches Bild
+    assert asyncio.run(main.recognize_image(image, {'threshold': 160})) == ([('FALKE', '01:01.000')], False)
+    assert asyncio.run(main.recognize_image(image, {'threshold': 120})) == ([('FALKE', '01:10.000')], True)
+    assert len(calls) == 2
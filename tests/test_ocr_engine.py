@@ -0,0 +1,86 @@
+import asyncio
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+import main
+from main import OCREngine
+
+SCREENSHOT_TEXT = 'RACER ZEIT\nFALKE | 01:10.000\nKOBRA | 01:05.000'
+
+
+class FakeEngine(OCREngine):
+    """Liefert festen Text statt Tesseract aufzurufen"""
+    name = 'fake'
+
+    def __init__(self, text: str):
+        self.text = text
+        self.images = []
+        self.closed = False
+
+    def image_to_string(self, image: Image.Image) -> str:
+        self.images.append(image.size)
+        return self.text
+
+    def close(self):
+        self.closed = True
+
+
+class FakeEngineFactory:
+    """Picklebar, damit sie als Initializer an den Prozess-Pool gehen kann"""
+    def __init__(self, text: str):
+        self.text = text
+
+    def __call__(self) -> FakeEngine:
+        return FakeEngine(self.text)
+
+
+def make_image() -> bytes:
+    buffer = BytesIO()
+    Image.new('RGB', (64, 32), (10, 10, 10)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def reset_engine(monkeypatch):
+    monkeypatch.setattr(main, 'ocr_engine', None)
+
+
+def test_engine_without_image_to_string_cannot_be_created():
+    class Incomplete(OCREngine):
+        pass
+
+    with pytest.raises(TypeError):
+        OCREngine()
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_init_ocr_engine_uses_factory():
+    main.init_ocr_engine(FakeEngineFactory(SCREENSHOT_TEXT))
+    engine = main.get_ocr_engine()
+    assert main.ocr_engine_name() == 'fake'
+    assert main.extract_race_results(make_image(), {'preprocess': False}) == [('FALKE', '01:10.000'), ('KOBRA', '01:05.000')]
+    assert engine.images == [(64, 32)]
+
+    # Eine neue Engine schließt die vorherige
+    main.init_ocr_engine(FakeEngineFactory(''))
+    assert engine.closed
+    assert main.extract_race_results(make_image(), {'preprocess': False}) == []
+
+
+def test_worker_pool_uses_injected_engine(monkeypatch):
+    monkeypatch.setattr(main, 'OCR_WORKERS', 1)
+    monkeypatch.setattr(main, 'OCR_WORKER_LISTEN', None)
+
+    async def run():
+        main.start_ocr_workers(FakeEngineFactory(SCREENSHOT_TEXT))
+        try:
+            loop = asyncio.get_running_loop()
+            assert await loop.run_in_executor(main.ocr_executor, main.ocr_engine_name) == 'fake'
+            return await main.run_ocr(make_image(), {'preprocess': False})
+        finally:
+            main.stop_ocr_workers()
+
+    assert asyncio.run(run()) == [('FALKE', '01:10.000'), ('KOBRA', '01:05.000')]
@@ -0,0 +1,35 @@
+from main import LEADERBOARD_EMPTY_PAGE, LeaderboardRenderer, paginate_leaderboard
+
+
+def test_fits_in_one_page():
+    pages, hidden = paginate_leaderboard('Kopf', ['a' * 10, 'b' * 10], 2, limit=100)
+    assert pages == ['Kopf\n' + 'a' * 10 + '\n' + 'b' * 10, LEADERBOARD_EMPTY_PAGE]
+    assert hidden == 0
+
+
+def test_spreads_over_pages_without_splitting_lines():
+    lines = [f"{i:02d}" + 'x' * 18 for i in range(6)]
+    pages, hidden = paginate_leaderboard('Kopf', lines, 3, limit=50)
+    assert hidden == 0
+    assert all(len(page) <= 50 for page in pages)
+    assert '\n'.join(pages).split('\n')[1:] == lines
+
+
+def test_reports_hidden_entries():
+    lines = [f"{i:02d}" + 'x' * 18 for i in range(10)]
+    pages, hidden = paginate_leaderboard('Kopf', lines, 1, limit=80)
+    assert len(pages) == 1
+    assert len(pages[0]) <= 80
+    assert pages[0].endswith(f"… und {hidden} weitere Einträge")
+    assert hidden == len(lines) - (len(pages[0].split('\n')) - 2)
+
+
+def test_renderer_only_reports_changed_posts():
+    renderer = LeaderboardRenderer()
+    entries = [{'time': '01:00.000', 'display_name': 'A'}, {'time': '01:01.000', 'display_name': 'B'}]
+    pages = renderer.render(entries, [10, 11], final=True)
+    assert renderer.changed(pages) == pages
+    renderer.sent.update(pages)
+    assert renderer.changed(renderer.render(entries, [10, 11], final=True)) == []
+    entries[1] = {'time': '01:00.500', 'display_name': 'B'}
+    assert renderer.changed(renderer.render(entries, [10, 11], final=True)) == [(10, pages[0][1].replace('01:01.000', '01:00.500'))]
@@ -0,0 +1,69 @@
+import asyncio
+import multiprocessing
+import os
+import time
+
+import pytest
+
+import main
+from test_ocr_engine import FakeEngineFactory
+
+
+def slow(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def crash():
+    os._exit(1)
+
+
+@pytest.fixture
+def executor(tmp_path):
+    executor = main.RemoteOCRExecutor(str(tmp_path / 'ocr.sock'), b'test', job_timeout=0.5)
+    yield executor
+    executor.shutdown(cancel_futures=True)
+
+
+@pytest.fixture
+def start_workers(executor):
+    workers = []
+
+    def start(count: int):
+        for _ in range(count):
+            worker = multiprocessing.Process(
+                target=main.run_remote_worker, args=(executor.address, b'test', FakeEngineFactory('')), daemon=True
+            )
+            worker.start()
+            workers.append(worker)
+
+    yield start
+    for worker in workers:
+        worker.terminate()
+        worker.join()
+
+
+def test_job_runs_on_remote_worker(executor, start_workers):
+    start_workers(1)
+    assert executor.submit(main.ocr_engine_name).result(timeout=10) == 'fake'
+
+
+def test_hung_job_times_out_and_worker_reconnects(executor, start_workers):
+    start_workers(1)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        with pytest.raises(TimeoutError):
+            await loop.run_in_executor(executor, slow, 2)
+        # Der Worker verbindet sich nach dem abgebrochenen Job neu und nimmt wieder Jobs an
+        return await asyncio.wait_for(loop.run_in_executor(executor, slow, 0.01), 10)
+
+    assert asyncio.run(run()) == 0.01
+
+
+def test_job_crashing_workers_fails_after_max_attempts(executor, start_workers):
+    start_workers(main.OCR_JOB_MAX_ATTEMPTS + 1)
+    with pytest.raises(main.OCRError):
+        executor.submit(crash).result(timeout=10)
+    # Ein Worker hat den Job nie bekommen und arbeitet weiter
+    assert executor.submit(main.ocr_engine_name).result(timeout=10) == 'fake'
@@ -0,0 +1,127 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import main
+from main import GERMAN_TZ, ChallengeDeadlineScheduler, ChannelConfig, OCRJobScheduler
+
+
+def make_message(channel_id, number):
+    return SimpleNamespace(id=number, channel=SimpleNamespace(id=channel_id))
+
+
+@pytest.fixture(autouse=True)
+def deadlines(monkeypatch):
+    scheduler = ChallengeDeadlineScheduler()
+    monkeypatch.setattr(main, 'deadline_scheduler', scheduler)
+    return scheduler
+
+
+def test_earliest_deadline_first_and_round_robin(deadlines):
+    now = datetime.now(GERMAN_TZ)
+    deadlines.set_deadline(1, now + timedelta(days=2))
+    deadlines.set_deadline(2, now + timedelta(days=1))
+    deadlines.set_deadline(3, now + timedelta(days=1))
+
+    async def run():
+        scheduler = OCRJobScheduler(max_size=10, channel_quota=5)
+        for channel_id, number in ((1, 1), (2, 2), (2, 3), (3, 4), (3, 5)):
+            await scheduler.put(make_message(channel_id, number), ChannelConfig(channel_id, 0))
+        order = []
+        for _ in range(5):
+            message, _, _ = await scheduler.get()
+            order.append(message.id)
+        return order
+
+    # Kanäle 2 und 3 enden zuerst und kommen im Wechsel dran, Kanal 1 zuletzt
+    assert asyncio.run(run()) == [2, 4, 3, 5, 1]
+
+
+def test_tickets_keep_channel_order():
+    async def run():
+        scheduler = OCRJobScheduler(max_size=10, channel_quota=5)
+        for number in range(3):
+            await scheduler.put(make_message(1, number), ChannelConfig(1, 0))
+        jobs = [await scheduler.get() for _ in range(3)]
+        assert [ticket for _, _, ticket in jobs] == [0, 1, 2]
+
+        # Ticket 1 ist vor Ticket 0 fertig, darf aber erst danach aktualisieren
+        await scheduler.finish_turn(1, 1)
+        waiter = asyncio.create_task(scheduler.wait_turn(1, 2))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        await scheduler.finish_turn(1, 0)
+        await asyncio.wait_for(waiter, 1)
+
+    asyncio.run(run())
+
+
+def test_channel_quota_blocks_put():
+    async def run():
+        scheduler = OCRJobScheduler(max_size=10, channel_quota=1)
+        await scheduler.put(make_message(1, 1), ChannelConfig(1, 0))
+        blocked = asyncio.create_task(scheduler.put(make_message(1, 2), ChannelConfig(1, 0)))
+        # Ein anderer Channel wird vom Kontingent nicht aufgehalten
+        await asyncio.wait_for(scheduler.put(make_message(2, 3), ChannelConfig(2, 0)), 1)
+        await asyncio.sleep(0)
+        assert not blocked.done()
+        await scheduler.get()
+        await scheduler.get()
+        await asyncio.wait_for(blocked, 1)
+        assert scheduler.qsize() == 1
+
+    asyncio.run(run())
+
+
+def test_drain_waits_for_blocked_put():
+    async def run():
+        scheduler = OCRJobScheduler(max_size=1, channel_quota=1)
+        await scheduler.put(make_message(1, 1), ChannelConfig(1, 0))
+        blocked = asyncio.create_task(scheduler.put(make_message(1, 2), ChannelConfig(1, 0)))
+        await asyncio.sleep(0)
+
+        async def worker():
+            for _ in range(2):
+                message, _, ticket = await scheduler.get()
+                await asyncio.sleep(0.01)
+                await scheduler.finish_turn(message.channel.id, ticket)
+                await scheduler.task_done(message.channel.id)
+
+        worker_task = asyncio.create_task(worker())
+        assert await scheduler.drain(1, timeout=1)
+        # drain kehrt erst zurück, wenn auch die wartende Nachricht verarbeitet ist
+        assert blocked.done()
+        await worker_task
+        assert await scheduler.drain(2, timeout=0.1)
+
+    asyncio.run(run())
+
+
+def test_drain_times_out():
+    async def run():
+        scheduler = OCRJobScheduler(max_size=10, channel_quota=5)
+        await scheduler.put(make_message(1, 1), ChannelConfig(1, 0))
+        return await scheduler.drain(1, timeout=0.05)
+
+    assert asyncio.run(run()) is False
+
+
+def test_background_jobs_run_after_messages():
+    async def run():
+        scheduler = OCRJobScheduler(max_size=10, channel_quota=5)
+
+        async def job():
+            return 'backfill'
+
+        background = asyncio.create_task(scheduler.run_background(job))
+        await asyncio.sleep(0)
+        await scheduler.put(make_message(1, 1), ChannelConfig(1, 0))
+        message, _, _ = await scheduler.get()
+        assert message.id == 1
+        run_job = await scheduler.get()
+        await run_job()
+        return await background
+
+    assert asyncio.run(run()) == 'backfill'
@@ -0,0 +1,39 @@
+from main import ChannelConfig, Leaderboard, SeasonStandings, points_for_rank
+
+
+def make_config(channel_id, results, is_active=True):
+    config = ChannelConfig(channel_id, channel_id * 10)
+    config.leaderboard = Leaderboard()
+    config.is_active = is_active
+    for driver_name, race_time in results:
+        config.leaderboard.submit(driver_name, None, race_time)
+    return config
+
+
+def test_incremental_matches_rebuild():
+    first = make_config(1, [('A', '01:00.000'), ('B', '01:01.000')], is_active=False)
+    second = make_config(2, [('B', '01:02.000'), ('C', '01:03.000')])
+
+    incremental = SeasonStandings()
+    incremental.update_channel(1, [])
+    incremental.update_channel(2, second.leaderboard.sorted_entries())
+    incremental.update_channel(1, first.leaderboard.sorted_entries())
+    incremental.finish_channel(1)
+    second.leaderboard.submit('C', None, '01:01.500')
+    incremental.update_channel(2, second.leaderboard.sorted_entries())
+
+    rebuilt = SeasonStandings()
+    rebuilt.rebuild([first, second])
+    assert incremental.top(10) == rebuilt.top(10)
+
+    top = {driver['identifier']: driver for driver in rebuilt.top(10)}
+    assert top['B']['points'] == points_for_rank(2) + points_for_rank(2)
+    assert top['A']['wins'] == 1
+    assert top['C']['wins'] == 0  # Challenge 2 läuft noch
+
+
+def test_remove_channel():
+    standings = SeasonStandings()
+    standings.update_channel(1, make_config(1, [('A', '01:00.000')]).leaderboard.sorted_entries())
+    standings.remove_channel(1)
+    assert standings.top(10) == []
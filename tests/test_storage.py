@@ -0,0 +1,99 @@
+import sqlite3
+
+import pytest
+
+from main import ChannelConfig, Leaderboard, SqliteStorage
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    # Der JSON-Import sucht channel_<id>.json im Arbeitsverzeichnis
+    monkeypatch.chdir(tmp_path)
+    storage = SqliteStorage(str(tmp_path / 'bot.db'))
+    yield storage
+    storage.close()
+
+
+def make_config():
+    config = ChannelConfig(1, 100)
+    config.extra_post_ids = [101]
+    config.driver_mappings = {'FALKE': 'falke'}
+    config.ocr_settings = {'threshold': 140}
+    config.leaderboard = Leaderboard()
+    config.leaderboard.submit('FALKE', 'falke', '01:10.000')
+    config.leaderboard.submit('KOBRA', None, '01:05.000')
+    return config
+
+
+def make_result(channel_id):
+    return {
+        'channel_id': channel_id, 'driver_name': 'FALKE', 'discord_user': 'falke', 'race_time': '01:10.000',
+        'time_ms': 70000, 'status': 'new', 'message_id': 5, 'submitted_at': '2026-01-01T20:00:00+01:00'
+    }
+
+
+def test_write_and_load(storage):
+    config = make_config()
+    storage.write([config.to_dict()], [make_result(1)])
+    loaded, = storage.load_configs()
+    assert loaded.to_dict() == config.to_dict()
+    count, = storage.connection.execute('SELECT COUNT(*) FROM results').fetchone()
+    assert count == 1
+
+
+def test_write_upserts(storage):
+    config = make_config()
+    storage.write([config.to_dict()], [])
+    config.is_active = False
+    config.leaderboard.submit('FALKE', 'falke', '01:00.000')
+    storage.write([config.to_dict()], [])
+    loaded, = storage.load_configs()
+    assert loaded.is_active is False
+    assert loaded.leaderboard.to_list() == config.leaderboard.to_list()
+
+
+def test_ended_at_set_for_inactive_insert(storage):
+    active = make_config()
+    ended = make_config()
+    ended.channel_id = 2
+    ended.is_active = False
+    storage.write([active.to_dict(), ended.to_dict()], [])
+    rows = dict(storage.connection.execute('SELECT channel_id, ended_at FROM channels').fetchall())
+    assert rows[1] is None
+    assert rows[2] is not None
+
+
+def test_delete_channel(storage):
+    storage.write([make_config().to_dict()], [make_result(1)])
+    storage.delete_channel(1)
+    assert storage.load_configs() == []
+    count, = storage.connection.execute('SELECT COUNT(*) FROM results').fetchone()
+    assert count == 0
+
+
+def test_migrates_old_schema(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / 'old.db')
+    connection = sqlite3.connect(path)
+    connection.execute("""
+        CREATE TABLE channels (
+            channel_id INTEGER PRIMARY KEY,
+            leaderboard_post_id INTEGER NOT NULL,
+            is_active INTEGER NOT NULL DEFAULT 1,
+            ocr_settings TEXT NOT NULL DEFAULT '{}',
+            leaderboard_loaded INTEGER NOT NULL DEFAULT 0,
+            ended_at TEXT,
+            updated_at TEXT NOT NULL
+        )
+    """)
+    connection.execute("INSERT INTO channels (channel_id, leaderboard_post_id, updated_at) VALUES (7, 70, 'x')")
+    connection.commit()
+    connection.close()
+
+    storage = SqliteStorage(path)
+    try:
+        loaded, = storage.load_configs()
+        assert loaded.channel_id == 7
+        assert loaded.extra_post_ids == []
+    finally:
+        storage.close()